@@ -1,6 +1,5 @@
 import numpy as np
 import pandas as pd
-import yfinance as yf
 import matplotlib.pyplot as plt
 import scipy.cluster.hierarchy as sch
 from scipy.cluster.hierarchy import dendrogram
@@ -19,6 +18,7 @@ class HRPOptimizer:
 
     def download_data(self):
         """Fetch prices and handle the MultiIndex columns from yfinance."""
+        import yfinance as yf
         print(f"Downloading data for: {self.tickers}...")
         raw_data = yf.download(self.tickers, start=self.start_date, end=self.end_date, auto_adjust=True)
         
@@ -33,52 +33,65 @@ class HRPOptimizer:
         self.returns = df.pct_change().dropna()
         return self.returns
 
+    def get_condensed_dist(self, corr):
+        """
+        Correlation distance sqrt(0.5 * (1 - corr)) as the condensed vector
+        linkage takes: the upper triangle is cut from the correlation matrix
+        in one boolean-mask gather (row by row, the condensed order) and
+        transformed in place, so no square distance matrix is built. It stays
+        float64, since linkage converts its input to float64 anyway.
+        """
+        c = np.asarray(corr, dtype=float)
+        n = len(c)
+        # A 1-byte mask costs less than triu_indices' two int64 index arrays,
+        # and squareform would copy the (view) matrix first
+        dist = c[np.arange(n)[:, None] < np.arange(n)]
+        np.subtract(1, dist, out=dist)
+        dist *= 0.5
+        np.clip(dist, 0, None, out=dist)  # rounding can push corr slightly above 1
+        return np.sqrt(dist, out=dist)
+
     def get_quasi_diag(self, link):
-        """Matrix Seriation: Sorts the clusters so similar assets are adjacent."""
-        link = link.astype(int)
-        sort_ix = pd.Series([link[-1, 0], link[-1, 1]])
-        num_items = link[-1, 3]
-        
-        while sort_ix.max() >= num_items:
-            sort_ix.index = range(0, sort_ix.shape[0] * 2, 2)
-            df0 = sort_ix[sort_ix >= num_items]
-            i = df0.index
-            j = df0.values - num_items
-            sort_ix[i] = link[j, 0]
-            df0 = pd.Series(link[j, 1], index=i + 1)
-            sort_ix = pd.concat([sort_ix, df0])
-            sort_ix = sort_ix.sort_index()
-            sort_ix.index = range(sort_ix.shape[0])
-            
-        return sort_ix.tolist()
+        """Matrix Seriation: Sorts the clusters so similar assets are adjacent (leaf order of the tree, O(N))."""
+        return sch.leaves_list(link).tolist()
 
-    def get_cluster_var(self, cov, cluster_items):
-        """Compute the variance of a cluster using inverse-variance weights."""
-        cov_slice = cov.loc[cluster_items, cluster_items]
-        ivp = 1. / np.diag(cov_slice)
-        ivp /= ivp.sum()
-        w = ivp.reshape(-1, 1)
-        cluster_var = np.dot(np.dot(w.T, cov_slice), w)[0, 0]
-        return cluster_var
+    @staticmethod
+    def _block_var(cov, inv_diag, a, b, buf):
+        """
+        Inverse-variance cluster variance of the contiguous block [a, b) of a
+        seriated covariance matrix, computed into the preallocated buf pair.
+        """
+        ivp = np.divide(inv_diag[a:b], inv_diag[a:b].sum(), out=buf[0][:b - a])
+        cov_w = np.dot(ivp, cov[a:b, a:b], out=buf[1][:b - a])
+        return np.dot(ivp, cov_w)
 
     def get_rec_bisection(self, cov, sort_ix):
-        """Recursive bisection to assign weights based on cluster risk."""
-        w = pd.Series(1.0, index=sort_ix)
-        c_items = [sort_ix]
-        
-        while len(c_items) > 0:
-            c_items = [i[j:k] for i in c_items for j, k in ((0, len(i) // 2), (len(i) // 2, len(i))) if len(i) > 1]
-            for i in range(0, len(c_items), 2):
-                c_items0 = c_items[i]
-                c_items1 = c_items[i+1]
-                
-                var0 = self.get_cluster_var(cov, c_items0)
-                var1 = self.get_cluster_var(cov, c_items1)
-                
-                alpha = 1 - var0 / (var0 + var1)
-                w[c_items0] *= alpha
-                w[c_items1] *= 1 - alpha
-        return w
+        """
+        Recursive bisection to assign weights based on cluster risk.
+        cov is reordered once into sort_ix order, so every cluster is a
+        contiguous block [a, b) and weights are updated by integer ranges.
+        """
+        items = list(sort_ix)
+        c = np.ascontiguousarray(cov.loc[items, items].to_numpy(dtype=float))
+        inv_diag = 1. / np.diag(c)
+        n = len(items)
+        w = np.ones(n)
+        buf = (np.empty(n), np.empty(n))
+
+        clusters = [(0, n)]
+        while clusters:
+            a, b = clusters.pop()
+            if b - a < 2:
+                continue
+            m = a + (b - a) // 2
+            var0 = self._block_var(c, inv_diag, a, m, buf)
+            var1 = self._block_var(c, inv_diag, m, b, buf)
+
+            alpha = 1 - var0 / (var0 + var1)
+            w[a:m] *= alpha
+            w[m:b] *= 1 - alpha
+            clusters += [(a, m), (m, b)]
+        return pd.Series(w, index=items)
 
     def optimize(self):
         """Execute the HRP pipeline."""
@@ -87,7 +100,7 @@ class HRPOptimizer:
             
         corr = self.returns.corr()
         cov = self.returns.cov()
-        dist = np.sqrt(0.5 * (1 - corr))
+        dist = self.get_condensed_dist(corr)
         link = sch.linkage(dist, 'single')
         sort_ix_raw = self.get_quasi_diag(link)
         sort_ix = corr.index[sort_ix_raw].tolist()
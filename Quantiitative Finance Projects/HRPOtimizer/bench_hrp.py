@@ -0,0 +1,123 @@
+import sys
+import time
+import warnings
+import argparse
+import tracemalloc
+import numpy as np
+import pandas as pd
+import scipy.cluster.hierarchy as sch
+from HRPOptimizer import HRPOptimizer
+
+SIZES = (100, 1000, 5000)
+
+
+# --- Legacy reference (the original pandas clustering and bisection) ---
+
+def legacy_quasi_diag(link):
+    link = link.astype(int)
+    sort_ix = pd.Series([link[-1, 0], link[-1, 1]])
+    num_items = link[-1, 3]
+    while sort_ix.max() >= num_items:
+        sort_ix.index = range(0, sort_ix.shape[0] * 2, 2)
+        df0 = sort_ix[sort_ix >= num_items]
+        i = df0.index
+        j = df0.values - num_items
+        sort_ix[i] = link[j, 0]
+        df0 = pd.Series(link[j, 1], index=i + 1)
+        sort_ix = pd.concat([sort_ix, df0])
+        sort_ix = sort_ix.sort_index()
+        sort_ix.index = range(sort_ix.shape[0])
+    return sort_ix.tolist()
+
+def legacy_clustering(corr):
+    # The square distance frame is treated as N observations of N features
+    dist = np.sqrt(0.5 * (1 - corr))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', sch.ClusterWarning)
+        link = sch.linkage(dist, 'single')
+    return corr.index[legacy_quasi_diag(link)].tolist()
+
+def legacy_cluster_var(cov, cluster_items):
+    cov_slice = cov.loc[cluster_items, cluster_items]
+    ivp = 1. / np.diag(cov_slice)
+    ivp /= ivp.sum()
+    w = ivp.reshape(-1, 1)
+    return np.dot(np.dot(w.T, cov_slice), w)[0, 0]
+
+def legacy_rec_bisection(cov, sort_ix):
+    w = pd.Series(1.0, index=sort_ix)
+    c_items = [sort_ix]
+    while len(c_items) > 0:
+        c_items = [i[j:k] for i in c_items for j, k in ((0, len(i) // 2), (len(i) // 2, len(i))) if len(i) > 1]
+        for i in range(0, len(c_items), 2):
+            c_items0, c_items1 = c_items[i], c_items[i + 1]
+            var0 = legacy_cluster_var(cov, c_items0)
+            var1 = legacy_cluster_var(cov, c_items1)
+            alpha = 1 - var0 / (var0 + var1)
+            w[c_items0] *= alpha
+            w[c_items1] *= 1 - alpha
+    return w
+
+
+# --- Synthetic universe ---
+
+def make_returns(n_assets, n_days=1260, n_factors=10, seed=0):
+    """Daily returns from a factor model, so the correlation matrix has cluster structure."""
+    rng = np.random.default_rng(seed)
+    loadings = rng.normal(size=(n_factors, n_assets)) * (rng.random(n_assets) < 0.5)
+    factors = rng.normal(size=(n_days, n_factors))
+    rets = 0.01 * (0.3 * factors @ loadings + rng.normal(size=(n_days, n_assets)))
+    return pd.DataFrame(rets, columns=[f'A{i:05d}' for i in range(n_assets)])
+
+def clustering(hrp, corr):
+    """Asset order from the condensed-distance clustering path used by optimize(), plus the linkage."""
+    link = sch.linkage(hrp.get_condensed_dist(corr), 'single')
+    return corr.index[hrp.get_quasi_diag(link)].tolist(), link
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    out = func(*args)
+    return out, time.perf_counter() - t0
+
+def profiled(func, *args):
+    """(result, seconds, peak traced MiB)."""
+    tracemalloc.start()
+    out, seconds = timed(func, *args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, seconds, peak / 2**20
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='HRP clustering and recursive bisection: array paths vs legacy pandas paths')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--legacy-max', type=int, default=max(SIZES), help='Skip the legacy path above this many assets')
+    args = parser.parse_args()
+
+    status = 0
+    hrp = HRPOptimizer([], None, None)
+    for n in args.sizes:
+        returns = make_returns(n)
+        cov, corr = returns.cov(), returns.corr()
+        (sort_ix, link), t_new, peak_new = profiled(clustering, hrp, corr)
+        line = f"{n:>6} assets  clustering  condensed {t_new * 1000:10.1f} ms {peak_new:8.1f} MiB peak"
+        if n <= args.legacy_max:
+            _, t_old, peak_old = profiled(legacy_clustering, corr)
+            # Seriation of the same tree must not change
+            ok = hrp.get_quasi_diag(link) == legacy_quasi_diag(link)
+            status |= not ok
+            line += (f"  legacy {t_old * 1000:10.1f} ms {peak_old:8.1f} MiB peak  speedup {t_old / t_new:7.1f}x"
+                     f"  seriation {'ok' if ok else 'MISMATCH'}")
+        print(line)
+
+        weights, t_new = timed(hrp.get_rec_bisection, cov, sort_ix)
+        line = f"{n:>6} assets  bisection   array     {t_new * 1000:10.1f} ms"
+        if n <= args.legacy_max:
+            ref, t_old = timed(legacy_rec_bisection, cov, sort_ix)
+            err = np.abs(weights - ref).max()
+            ok = weights.index.equals(ref.index) and np.allclose(weights, ref, rtol=1e-12, atol=0)
+            status |= not ok
+            line += f"  legacy {t_old * 1000:10.1f} ms  speedup {t_old / t_new:7.1f}x  max |dw| {err:.1e} {'ok' if ok else 'MISMATCH'}"
+        print(line)
+    sys.exit(status)
@@ -0,0 +1,89 @@
+import pandas as pd
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path: sys.path.append(current_dir)
+
+from main import run_pipeline
+from src.data import PriceStore
+from src.parallel import resolve_n_jobs
+
+# VIX close series, loaded once by the parent and handed to each worker at startup
+_VIX = None
+
+def _init_worker(vix):
+    global _VIX
+    _VIX = vix
+
+def _run_ticker(ticker, start, end, cache_dir):
+    t0 = time.perf_counter()
+    try:
+        out = run_pipeline(ticker, start=start, end=end, vix=_VIX, save_csv=False, n_jobs=1, verbose=False,
+                           cache_dir=os.path.join(cache_dir, ticker) if cache_dir else None)
+    except Exception as e:
+        return {'ticker': ticker, 'results': None, 'error': repr(e), 'timings': {},
+                'wall': time.perf_counter() - t0}
+    out['wall'] = time.perf_counter() - t0
+    out['error'] = None
+    return out
+
+def run_universe(tickers, start='2015-01-01', end='2025-01-01', n_jobs=-1,
+                 output='data/universe_results.parquet', cache_dir='.cache/stages'):
+    """
+    Runs run_pipeline for every ticker on a process pool, sharing one VIX series.
+    Test results land in a single Parquet file (one 'Ticker' column); returns the
+    per-ticker report with wall-clock and per-stage seconds.
+    """
+    t0 = time.perf_counter()
+    store = PriceStore()
+    vix = store.load('^VIX', start=start, end=end, columns=['Close'])['Close']
+
+    workers = min(resolve_n_jobs(n_jobs), len(tickers))
+    args = [(t, start, end, cache_dir) for t in tickers]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(vix,)) as pool:
+            outputs = list(pool.map(_run_ticker, *zip(*args)))
+    else:
+        _init_worker(vix)
+        outputs = [_run_ticker(*a) for a in args]
+
+    frames, report = [], []
+    for out in outputs:
+        row = {'ticker': out['ticker'], 'wall_seconds': out['wall'], 'error': out['error'],
+               'cv_score': out.get('cv_score'), 'activity': out.get('activity'), 'top_feature': out.get('top_feature')}
+        row.update({f'{k}_seconds': v for k, v in out['timings'].items()})
+        report.append(row)
+        if out['results'] is not None:
+            frames.append(out['results'].assign(Ticker=out['ticker']))
+
+    if frames:
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        pd.concat(frames).rename_axis('Date').to_parquet(output)
+        print(f"Results for {len(frames)} tickers saved to '{output}'")
+    report = pd.DataFrame(report).set_index('ticker')
+    print(f"Universe run finished in {time.perf_counter() - t0:.1f}s ({workers} workers)")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the alpha pipeline over a ticker universe.")
+    parser.add_argument('tickers', nargs='+', help="Ticker symbols, or @file with one symbol per line")
+    parser.add_argument('--start', default='2015-01-01')
+    parser.add_argument('--end', default='2025-01-01')
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--output', default='data/universe_results.parquet')
+    args = parser.parse_args()
+
+    tickers = []
+    for t in args.tickers:
+        if t.startswith('@'):
+            with open(t[1:]) as f:
+                tickers.extend(line.strip() for line in f if line.strip())
+        else:
+            tickers.append(t)
+
+    report = run_universe(tickers, start=args.start, end=args.end, n_jobs=args.n_jobs, output=args.output)
+    print(report.to_string())
@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.models import AlphaModel
+
+
+def legacy_prepare_features(df, lags=5):
+    """The original shift/concat/dropna builder, kept as the reference."""
+    X = df[['Price', 'VIX', 'Log_Volume']].copy()
+    for i in range(1, lags + 1):
+        X[f'Price_lag_{i}'] = df['Price'].shift(i)
+    y = df['label']
+    valid_data = pd.concat([X, y, df[['uniqueness', 't1']]], axis=1).dropna()
+    return valid_data.drop(columns=['label', 'uniqueness', 't1']), valid_data['label'], valid_data['uniqueness'], valid_data['t1']
+
+
+def make_frame(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2000-01-01', periods=n_rows, freq='min')
+    df = pd.DataFrame({
+        'Price': rng.normal(size=n_rows),
+        'VIX': rng.normal(size=n_rows),
+        'Log_Volume': rng.normal(size=n_rows),
+        'label': rng.choice([-1.0, 1.0], n_rows),
+        'uniqueness': rng.random(n_rows),
+        't1': index + pd.Timedelta('10min'),
+    }, index=index)
+    df.iloc[::50, df.columns.get_loc('label')] = np.nan
+    return df
+
+
+def measure(func):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = func()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, elapsed, peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Peak memory of the lag feature builders')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--lags', type=int, default=20)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    model = AlphaModel()
+    runs = [
+        ('legacy (shift + concat)', lambda: legacy_prepare_features(df, args.lags)),
+        ('strided float64', lambda: model.prepare_features(df, args.lags)),
+        ('strided float32', lambda: model.prepare_features(df, args.lags, dtype=np.float32)),
+    ]
+
+    print(f"{args.rows:,} rows, {args.lags} lags")
+    results = {}
+    for name, func in runs:
+        results[name], elapsed, peak = measure(func)
+        print(f"{name:<26} {elapsed * 1000:9.1f} ms   peak {peak / 2**20:8.1f} MiB")
+
+    ref, new = results['legacy (shift + concat)'], results['strided float64']
+    pd.testing.assert_frame_equal(ref[0], new[0])
+    print("float64 output matches the legacy builder")
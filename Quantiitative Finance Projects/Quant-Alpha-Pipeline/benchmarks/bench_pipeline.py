@@ -0,0 +1,238 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src import native
+from src.features import frac_diff_ffd
+from src.labeling import get_daily_vol, apply_triple_barrier, get_bins, get_concurrency, get_sample_uniqueness
+from src.validation import PurgedKFold
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+
+# --- Reference implementations (the original loop versions) ---
+
+def ref_frac_diff_ffd(series, d, thres=1e-4):
+    w = [1.0]
+    for k in range(1, len(series)):
+        w_ = -w[-1] / k * (d - k + 1)
+        if abs(w_) < thres:
+            break
+        w.append(w_)
+    w = np.array(w[::-1]).reshape(-1, 1)
+    width = len(w) - 1
+    df = {}
+    for name in series.columns:
+        seriesF = series[name].ffill().dropna()
+        vals = seriesF.values
+        res = [np.dot(w.T, vals[i - width : i + 1])[0] for i in range(width, len(vals))]
+        df[name] = pd.Series(res, index=seriesF.index[width:])
+    return pd.DataFrame(df)
+
+def ref_apply_triple_barrier(close, events, pt_sl):
+    out = events[['t1']].copy(deep=True)
+    pt = pt_sl[0] * events['trgt']
+    sl = -pt_sl[1] * events['trgt']
+    for loc, t1 in events['t1'].fillna(close.index[-1]).items():
+        path = close[loc:t1]
+        returns = (path / close[loc] - 1) * events.at[loc, 'side']
+        out.loc[loc, 'sl'] = returns[returns < sl[loc]].index.min()
+        out.loc[loc, 'pt'] = returns[returns > pt[loc]].index.min()
+    return out
+
+def ref_get_bins(barrier_hits, close):
+    out = barrier_hits.copy(deep=True)
+    for loc, row in barrier_hits.iterrows():
+        first_hit = min(row.fillna(close.index[-1]))
+        if row['pt'] == first_hit: out.loc[loc, 'bin'] = 1
+        elif row['sl'] == first_hit: out.loc[loc, 'bin'] = -1
+        else: out.loc[loc, 'bin'] = 0
+    return out
+
+def ref_get_concurrency(bar_start, bar_end, close_index):
+    num_concur = pd.Series(0, index=close_index)
+    for start, end in zip(bar_start, bar_end):
+        num_concur.loc[start:end] += 1
+    return num_concur
+
+def ref_get_sample_uniqueness(bar_start, bar_end, num_concur):
+    uniqueness = pd.Series(index=bar_start, dtype=float)
+    for i in range(len(bar_start)):
+        start, end = bar_start[i], bar_end.iloc[i]
+        uniqueness.iloc[i] = (1.0 / num_concur.loc[start:end]).mean()
+    return uniqueness
+
+def ref_purged_split(n_splits, pct_embargo, X, t1):
+    from sklearn.model_selection import KFold
+    embargo_period = int(len(X) * pct_embargo)
+    for train_indices, test_indices in KFold(n_splits=n_splits, shuffle=False).split(X):
+        test_t1 = t1.iloc[test_indices]
+        test_start, test_end = test_t1.index[0], test_t1.max()
+        keep = []
+        for idx in train_indices:
+            bar_start, bar_end = t1.index[idx], t1.iloc[idx]
+            if not (bar_end < test_start or bar_start > test_end):
+                continue
+            if bar_start > test_end and idx < test_indices[-1] + embargo_period:
+                continue
+            keep.append(idx)
+        yield np.array(keep), test_indices
+
+
+# --- Synthetic data ---
+
+def make_data(n_bars, event_every=10, horizon=50, seed=0):
+    """
+    GBM close prices on a 5-minute grid, events on every `event_every`-th bar
+    with a vertical barrier `horizon` bars later and daily vol as the target.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2000-01-03', periods=n_bars, freq='5min')
+    log_ret = -0.5 * 1e-6 + 1e-3 * rng.standard_normal(n_bars)
+    close = pd.Series(100 * np.exp(np.cumsum(log_ret)), index=index, name='Close')
+
+    vol = get_daily_vol(close, span0=100)
+    starts = index[1:-horizon:event_every]
+    t1 = pd.Series(index[index.get_indexer(starts) + horizon], index=starts)
+    events = pd.DataFrame({'t1': t1, 'trgt': vol.reindex(starts), 'side': 1.0}).dropna()
+    return close, events
+
+
+def run_stages(close, events, method='auto'):
+    """Runs every stage once, in pipeline order. Returns {stage: (seconds, output)}."""
+    results = {}
+
+    def timed(name, func, *args, **kwargs):
+        t0 = time.perf_counter()
+        out = func(*args, **kwargs)
+        results[name] = (time.perf_counter() - t0, out)
+        return out
+
+    timed('frac_diff_ffd', frac_diff_ffd, np.log(close.to_frame('Price')), d=0.4, thres=1e-4, method=method)
+    timed('get_daily_vol', get_daily_vol, close, span0=100)
+    hits = timed('apply_triple_barrier', apply_triple_barrier, close, events, pt_sl=[1, 1])
+    timed('get_bins', get_bins, hits, close)
+    end_times = hits[['t1', 'sl', 'pt']].min(axis=1)
+    concur = timed('get_concurrency', get_concurrency, events.index, end_times, close.index)
+    timed('get_sample_uniqueness', get_sample_uniqueness, events.index, end_times, concur)
+    # A fresh splitter each time, so its split cache does not hide the work
+    timed('PurgedKFold.split', lambda: list(PurgedKFold(n_splits=5, pct_embargo=0.01).split(events, t1=end_times)))
+    return results
+
+
+# --- Equivalence checks ---
+
+def check_equivalence(n_bars):
+    """
+    Compares each stage with its reference loop version, and the FFD backends
+    with each other. Returns a list of (check, passed, detail).
+    """
+    close, events = make_data(n_bars, seed=1)
+    prices = np.log(close.to_frame('Price'))
+    out = run_stages(close, events)
+    checks = []
+
+    def record(name, passed, detail=''):
+        checks.append((name, bool(passed), detail))
+
+    ffd = out['frac_diff_ffd'][1]
+    err = np.abs(ffd - ref_frac_diff_ffd(prices, d=0.4)).max().max()
+    record('frac_diff_ffd vs loop', err < 1e-10, f'max abs err {err:.2e}')
+    for method in ('direct', 'fft') + (('cpp',) if native.available() else ()):
+        err = np.abs(frac_diff_ffd(prices, d=0.4, method=method) - ffd).max().max()
+        record(f'frac_diff_ffd {method} vs auto', err < 1e-10, f'max abs err {err:.2e}')
+
+    hits = out['apply_triple_barrier'][1]
+    ref_hits = ref_apply_triple_barrier(close, events, pt_sl=[1, 1])
+    same = all(pd.to_datetime(ref_hits[c]).equals(hits[c]) for c in ('t1', 'sl', 'pt'))
+    record('apply_triple_barrier vs loop', same)
+    split_hits = apply_triple_barrier(close, events, pt_sl=[1, 1], n_jobs=2, min_events_per_job=len(events) // 4)
+    record('apply_triple_barrier n_jobs=2 vs 1', split_hits.equals(hits))
+
+    bins = out['get_bins'][1]
+    record('get_bins vs loop', np.array_equal(ref_get_bins(hits, close)['bin'].to_numpy(dtype=float), bins['bin'].to_numpy()))
+
+    end_times = hits[['t1', 'sl', 'pt']].min(axis=1)
+    concur = out['get_concurrency'][1]
+    record('get_concurrency vs loop', ref_get_concurrency(events.index, end_times, close.index).equals(concur))
+
+    uniq = out['get_sample_uniqueness'][1]
+    err = np.abs(ref_get_sample_uniqueness(events.index, end_times, concur) - uniq).max()
+    record('get_sample_uniqueness vs loop', err < 1e-14, f'max abs err {err:.2e}')
+
+    splits = out['PurgedKFold.split'][1]
+    ref_splits = list(ref_purged_split(5, 0.01, events, end_times))
+    record('PurgedKFold.split vs loop', len(splits) == len(ref_splits) and all(
+        np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1]) for a, b in zip(splits, ref_splits)))
+    return checks
+
+
+# --- Runner ---
+
+def run_benchmarks(sizes=SIZES, repeat=3):
+    """Best-of-`repeat` seconds per (size, stage)."""
+    rows = []
+    for n_bars in sizes:
+        close, events = make_data(n_bars)
+        best = {}
+        for _ in range(repeat):
+            for name, (seconds, _) in run_stages(close, events).items():
+                best[name] = min(seconds, best.get(name, np.inf))
+        for name, seconds in best.items():
+            rows.append({'n_bars': n_bars, 'n_events': len(events), 'stage': name, 'seconds': seconds})
+            print(f"{n_bars:>10,} bars  {name:<24} {seconds * 1000:10.2f} ms")
+    return rows
+
+def compare(rows, baseline_rows, tolerance):
+    """Joins current and baseline timings; flags stages slower than tolerance x baseline."""
+    current = pd.DataFrame(rows).set_index(['n_bars', 'stage'])['seconds']
+    baseline = pd.DataFrame(baseline_rows).set_index(['n_bars', 'stage'])['seconds']
+    table = pd.concat({'baseline': baseline, 'current': current}, axis=1).dropna()
+    table['speedup'] = table['baseline'] / table['current']
+    table['regressed'] = table['current'] > tolerance * table['baseline']
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline hot paths on synthetic GBM data.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline', help='A previous --output file to compare against')
+    parser.add_argument('--tolerance', type=float, default=1.25, help='Slowdown factor that counts as a regression')
+    parser.add_argument('--check-size', type=int, default=20_000, help='Bars used for the equivalence checks (0 to skip)')
+    args = parser.parse_args()
+
+    status = 0
+    checks = []
+    if args.check_size:
+        print(f"Equivalence checks on {args.check_size:,} bars")
+        checks = check_equivalence(args.check_size)
+        for name, passed, detail in checks:
+            print(f"  [{'ok' if passed else 'FAIL'}] {name} {detail}")
+        status |= not all(passed for _, passed, _ in checks)
+
+    rows = run_benchmarks(args.sizes, args.repeat)
+    report = {
+        'meta': {'timestamp': pd.Timestamp.now().isoformat(), 'python': platform.python_version(),
+                 'numpy': np.__version__, 'pandas': pd.__version__, 'machine': platform.machine(),
+                 'native_engine': native.available()},
+        'checks': [{'check': n, 'passed': p, 'detail': d} for n, p, d in checks],
+        'results': rows,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to '{args.output}'")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            table = compare(rows, json.load(f)['results'], args.tolerance)
+        print(table.to_string(float_format=lambda v: f'{v:.4f}'))
+        status |= bool(table['regressed'].any())
+    sys.exit(status)
@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.models import AlphaModel, get_bet_sizes
+
+FEATURES = ['Price', 'VIX', 'Log_Volume'] + [f'Price_lag_{i}' for i in range(1, 6)]
+
+
+def train_synthetic(folder, n_rows=2500, seed=0):
+    """Fits an AlphaModel on random features shaped like the pipeline's and saves it."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2015-01-01', periods=n_rows)
+    X = pd.DataFrame(rng.normal(size=(n_rows, len(FEATURES))), index=index, columns=FEATURES)
+    y = pd.Series(np.where(X['Price'] + rng.normal(size=n_rows) > 0, 1.0, -1.0), index=index)
+    model = AlphaModel()
+    model.train_and_meta_label(X, y)
+    model.save(folder)
+    return model, X
+
+
+def latencies(func, rows, repeat):
+    out = np.empty(repeat)
+    for i in range(repeat):
+        row = rows[i % len(rows)]
+        t0 = time.perf_counter()
+        func(row)
+        out[i] = time.perf_counter() - t0
+    return out * 1e6
+
+
+def summary(name, us):
+    pct = np.percentile(us, [50, 90, 99, 99.9])
+    print(f"{name:<34} p50 {pct[0]:8.1f}  p90 {pct[1]:8.1f}  p99 {pct[2]:8.1f}  p99.9 {pct[3]:8.1f}  max {us.max():8.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Latency of AlphaModel.score_latest on one bar')
+    parser.add_argument('--model-dir', help='Folder written by AlphaModel.save (default: train on synthetic data)')
+    parser.add_argument('--repeat', type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = args.model_dir or tmp
+        fitted, X = (None, None) if args.model_dir else train_synthetic(folder)
+
+        t0 = time.perf_counter()
+        model = AlphaModel.load(folder)
+        print(f"load (memory-mapped): {(time.perf_counter() - t0) * 1e3:.2f} ms")
+
+        n_features = len(model.feature_names_)
+        rows = X.to_numpy()[-500:] if X is not None else np.random.default_rng(1).normal(size=(500, n_features))
+        model.score_latest(rows[0])  # touch the mapped pages once
+        summary('score_latest (array)', latencies(model.score_latest, rows, args.repeat))
+        series = [pd.Series(r, index=model.feature_names_) for r in rows]
+        summary('score_latest (Series)', latencies(model.score_latest, series, args.repeat))
+
+        if fitted is not None:
+            def sklearn_path(row):
+                x = pd.DataFrame(row.reshape(1, -1), columns=FEATURES)
+                fitted.primary_model.predict(x)
+                get_bet_sizes(fitted.meta_model.predict_proba(x)[:, 1])
+            summary('sklearn predict + predict_proba', latencies(sklearn_path, rows, min(args.repeat, 1000)))
@@ -1,6 +1,5 @@
 import pandas as pd
 import numpy as np
-import yfinance as yf
 import os
 import sys
 from sklearn.metrics import classification_report
@@ -11,70 +10,134 @@ if current_dir not in sys.path: sys.path.append(current_dir)
 
 try:
     from src.features import frac_diff_ffd
-    from src.labeling import get_daily_vol, apply_triple_barrier, get_bins, get_concurrency, get_sample_uniqueness
+    from src.labeling import get_daily_vol, cusum_filter, apply_triple_barrier, get_bins, get_concurrency, get_sample_uniqueness
     from src.models import AlphaModel
     from src.validation import PurgedKFold
+    from src.cache import StageCache
+    from src.data import PriceStore
+    from src.profiling import StageProfiler, count_rows
 except ImportError as e:
     print(f"IMPORT ERROR: {e}. Check your src/ folder.")
     sys.exit(1)
 
-def run_pipeline():
-    ticker = 'SPY'  # You can change this to 'SPY' or any other ticker
-    print(f"--- STARTING TUNED OPTIMAL ALPHA PIPELINE ({ticker}) ---")
+def run_pipeline(ticker='SPY', start='2015-01-01', end='2025-01-01', vix=None, store=None,
+                 cache_dir='.cache/stages', save_csv=True, n_jobs=-1, verbose=True,
+                 event_filter='cusum', cusum_h=1.0, bootstrap='uniform', mode='split',
+                 profile_stage=None, prices=None, vol_lookback=pd.Timedelta(days=1),
+                 vertical_barrier=pd.Timedelta(days=20), importance='impurity', model_dir='models'):
+    """
+    Full features -> labels -> CV -> meta-label flow for one ticker.
+    vix can be passed in (a Close series) to skip loading it again.
+    Events are sampled by a CUSUM filter at cusum_h x daily vol, or on every
+    bar with event_filter='all'. bootstrap='sequential' bags the models with
+    the sequential bootstrap over label lifetimes. mode='walk_forward' replaces
+    the single 80/20 split with expanding-window refits every quarter (91
+    days) after a two-year initial training window.
+    Each stage's wall/CPU time, peak RSS and row counts are written to
+    Final_results{ticker}_profile.json next to the CSV; profile_stage names
+    one stage (e.g. 'triple_barrier') to also capture under cProfile.
+    prices takes an OHLCV frame in place of the stored daily bars, e.g.
+    intraday bars from src.bars.read_bars; vol_lookback then sets the return
+    horizon behind the volatility target, and VIX is loaded for the span of
+    those bars. vertical_barrier is how long each label may run.
+    importance picks how features are ranked: 'impurity' (the meta model's
+    feature_importances_, the default and free), or opt in to 'mda' (purged-CV
+    permutation importance) or 'sfi' (single-feature purged CV), which refit
+    the primary model per fold.
+    With save_csv, the fitted models are also saved to model_dir/<ticker> for
+    AlphaModel.load(...).score_latest(...).
+    Returns the test results, summary metrics and seconds spent per stage.
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
+    log(f"--- STARTING TUNED OPTIMAL ALPHA PIPELINE ({ticker}) ---")
+    profiler = StageProfiler(profile_stage)
+
+    # Stage outputs are reused across runs when their inputs and parameters match
+    cache = StageCache(cache_dir, verbose=verbose) if cache_dir else None
+
+    def stage(name, func, *args, **kwargs):
+        with profiler.stage(name, rows_in=count_rows(args[0]) if args else None) as rec:
+            out = cache.run(name, func, *args, **kwargs) if cache else func(*args, **kwargs)
+            rec['rows_out'] = count_rows(out)
+        return out
 
     # 1. DATA ACQUISITION
-    print("Fetching SPY and VIX context...")
-    raw_SPY = yf.download(ticker, start='2015-01-01', end='2025-01-01', auto_adjust=True)
-    raw_vix = yf.download('^VIX', start='2015-01-01', end='2025-01-01', auto_adjust=True)
-    
-    if isinstance(raw_SPY.columns, pd.MultiIndex): raw_SPY.columns = raw_SPY.columns.get_level_values(0)
-    if isinstance(raw_vix.columns, pd.MultiIndex): raw_vix.columns = raw_vix.columns.get_level_values(0)
+    # Served from the local price store; only missing dates hit the network
+    log(f"Loading {ticker} and VIX context...")
+    with profiler.stage('data') as rec:
+        store = store if store is not None else PriceStore()
+        raw_SPY = prices if prices is not None else store.load(ticker, start=start, end=end)
+        if vix is None:
+            # Supplied bars set the VIX range; a week back covers the session before the first bar
+            vix_start, vix_end = (start, end) if prices is None else (
+                prices.index[0].normalize() - pd.Timedelta(days=7), prices.index[-1].normalize() + pd.Timedelta(days=1))
+            vix = store.load('^VIX', start=vix_start, end=vix_end, columns=['Close'])['Close']
+        rec['rows_out'] = len(raw_SPY)
 
     # 2. FEATURE ENGINEERING (Expansion)
     price_series = raw_SPY['Close']
     log_prices = np.log(raw_SPY[['Close']]).rename(columns={'Close': 'Price'})
     
-    X = frac_diff_ffd(log_prices, d=0.3)
+    X = stage('frac_diff_ffd', frac_diff_ffd, log_prices, d=0.3, thres=1e-4)
     X['Log_Volume'] = np.log(raw_SPY['Volume'].loc[X.index])
-    X['VIX'] = raw_vix['Close'].loc[X.index]
+    if (X.index == X.index.normalize()).all():
+        X['VIX'] = vix.reindex(X.index)
+    else:
+        # Intraday bars take the previous session's VIX close, which is known at the open
+        X['VIX'] = vix.shift(1).reindex(X.index.normalize()).to_numpy()
 
     # 3. LABELING (1:1 Ratio Tuning)
-    print("Step 2: Generating Tuned Triple-Barrier labels (1:1 Ratio)...")
-    vol = get_daily_vol(price_series)
-    t_events = X.index 
-    t1_idx = price_series.index.searchsorted(t_events + pd.Timedelta(days=20))
+    log("Step 2: Generating Tuned Triple-Barrier labels (1:1 Ratio)...")
+    vol = stage('daily_vol', get_daily_vol, price_series, span0=100, lookback=vol_lookback)
+    if event_filter == 'cusum':
+        t_events = stage('cusum', cusum_filter, price_series, threshold=vol * cusum_h).intersection(X.index)
+    else:
+        t_events = X.index
+    t1_idx = price_series.index.searchsorted(t_events + pd.Timedelta(vertical_barrier))
     t1_idx = t1_idx[t1_idx < price_series.shape[0]]
     t1_vertical = pd.Series(price_series.index[t1_idx], index=t_events[:len(t1_idx)])
     
     events = pd.concat({'t1': t1_vertical, 'trgt': vol, 'side': pd.Series(1, index=t1_vertical.index)}, axis=1).dropna()
     
     # We change pt_sl from [2, 1] to [1, 1] for the trending SPY regime
-    raw_labels = apply_triple_barrier(price_series, events, pt_sl=[1, 1])
+    raw_labels = stage('triple_barrier', apply_triple_barrier, price_series, events, pt_sl=[1, 1], n_jobs=n_jobs)
+    y = stage('bins', get_bins, raw_labels, price_series, side=events['side'])
     
     # UNIQUENESS & ALIGNMENT
     end_times = raw_labels.min(axis=1).fillna(price_series.index[-1])
-    concur = get_concurrency(events.index, end_times, price_series.index)
-    uniqueness = get_sample_uniqueness(events.index, end_times, concur)
-    y = get_bins(raw_labels, price_series)
+    concur = stage('concurrency', get_concurrency, events.index, end_times, price_series.index)
+    uniqueness = stage('uniqueness', get_sample_uniqueness, events.index, end_times, concur)
 
-    final_df = X.loc[X.index.intersection(y.index)].copy()
-    final_df['label'] = y.loc[final_df.index, 'bin']
-    final_df['uniqueness'] = uniqueness.loc[final_df.index]
-    final_df['t1'] = end_times.loc[final_df.index]
+    # Labels stay on the bar grid so lags are taken over bars; prepare_features drops non-event rows
+    final_df = X.copy()
+    final_df['label'] = y['bin'].reindex(X.index)
+    final_df['uniqueness'] = uniqueness.reindex(X.index)
+    final_df['t1'] = end_times.reindex(X.index)
 
     # 4. MACHINE LEARNING (Confidence Veto)
-    model_engine = AlphaModel()
-    X_ml, y_ml, sw_ml, t1_ml = model_engine.prepare_features(final_df)
+    model_engine = AlphaModel(bootstrap=bootstrap, n_jobs=n_jobs)
+    X_ml, y_ml, sw_ml, t1_ml = profiler.wrap('prepare_features', model_engine.prepare_features)(final_df)
 
-    print("Running Purged K-Fold CV...")
+    log("Running Purged K-Fold CV...")
     cv = PurgedKFold(n_splits=5, pct_embargo=0.01)
-    cv_score = model_engine.cross_validate_purged(X_ml, y_ml, t1=t1_ml, cv_gen=cv, sample_weight=sw_ml)
+    # Splits are computed once here and reused from the splitter's cache by the CV below
+    profiler.wrap('purged_splits', cv.get_splits)(X_ml, t1_ml)
+    cv_score = stage('purged_cv', model_engine.cross_validate_purged, X_ml, y_ml, t1=t1_ml, cv_gen=cv,
+                     sample_weight=sw_ml, n_jobs=n_jobs, bar_index=price_series.index)
     
     # Execute with 60% probability threshold for betting
-    print("Executing Final Walk-Forward with 60% Confidence Veto...")
-    y_test, primary_preds, final_signals, bet_sizes = model_engine.train_and_meta_label(
-        X_ml, y_ml, sample_weight=sw_ml, prob_threshold=0.60
-    )
+    log("Executing Final Walk-Forward with 60% Confidence Veto...")
+    with profiler.stage('meta_label', rows_in=len(X_ml)) as rec:
+        if mode == 'walk_forward':
+            wf = model_engine.walk_forward(X_ml, y_ml, t1_ml, sample_weight=sw_ml, prob_threshold=0.60, n_jobs=n_jobs,
+                                           bar_index=price_series.index)
+            y_test, primary_preds, final_signals, bet_sizes = (
+                y_ml.loc[wf.index], wf['Model_Prediction'], wf['Signal'], wf['Bet_Size'])
+        else:
+            y_test, primary_preds, final_signals, bet_sizes = model_engine.train_and_meta_label(
+                X_ml, y_ml, sample_weight=sw_ml, prob_threshold=0.60, t1=t1_ml, bar_index=price_series.index
+            )
+        rec['rows_out'] = len(y_test)
 
     # 5. SAVE TEST RESULTS
     test_results = pd.DataFrame({
@@ -83,18 +146,43 @@ def run_pipeline():
         'Bet_Size': bet_sizes
     }, index=y_test.index)
     
-    test_results.to_csv('Final_resultsSPY.csv')
-    print("\nTuned test results saved to 'Final_resultsSPY.csv'")
+    if save_csv:
+        test_results.to_csv(f'Final_results{ticker}.csv')
+        log(f"\nTuned test results saved to 'Final_results{ticker}.csv'")
+        model_engine.meta_outputs_.to_parquet(f'Meta_outputs{ticker}.parquet')
+        if model_dir:
+            model_engine.save(os.path.join(model_dir, ticker), prob_threshold=0.60)
+        profiler.save(f'Final_results{ticker}_profile.json', ticker=ticker, start=start, end=end, mode=mode,
+                      event_filter=event_filter, bootstrap=bootstrap, n_jobs=n_jobs)
 
     # 6. FINAL REPORT
-    print("\n" + "="*45)
-    print("TUNED STRATEGY REPORT")
-    print("="*45)
-    print(f"Purged K-Fold CV Accuracy: {cv_score:.2%}")
-    print(f"Strategy Activity (Betting %): {(primary_preds != 0).mean():.2%}")
-    print(f"Top Predictive Features:")
-    print(model_engine.get_feature_importance(X_ml.columns).head(3))
-    
+    if importance == 'impurity':
+        ranking = model_engine.get_feature_importance(X_ml.columns).to_frame('mean')
+    else:
+        method = model_engine.get_mda_importance if importance == 'mda' else model_engine.get_sfi_importance
+        ranking = stage(f'{importance}_importance', method, X_ml, y_ml, t1_ml, cv, sample_weight=sw_ml, n_jobs=n_jobs,
+                        bar_index=price_series.index)
+    if save_csv:
+        ranking.rename_axis('Feature').to_csv(f'Feature_importance{ticker}.csv')
+    activity = (primary_preds != 0).mean()
+    log("\n" + "="*45)
+    log("TUNED STRATEGY REPORT")
+    log("="*45)
+    log(f"Purged K-Fold CV Accuracy: {cv_score:.2%}")
+    log(f"Strategy Activity (Betting %): {activity:.2%}")
+    log(f"Top Predictive Features:")
+    log(ranking.head(3))
+    if cache:
+        log("\nStage cache:")
+        log(cache.report())
+    log("\nStage profile:")
+    log(profiler.to_frame().set_index('stage')[['wall_seconds', 'cpu_seconds', 'peak_rss_mb', 'rows_in', 'rows_out']])
+    if profile_stage:
+        log(profiler.profile_report())
+
+    return {'ticker': ticker, 'results': test_results, 'meta_outputs': model_engine.meta_outputs_,
+            'cv_score': cv_score, 'activity': activity,
+            'top_feature': ranking.index[0], 'timings': profiler.timings()}
 
 if __name__ == "__main__":
     run_pipeline()
\ No newline at end of file
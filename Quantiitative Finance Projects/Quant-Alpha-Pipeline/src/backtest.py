@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+def _per_variant(value, columns):
+    """
+    Scalar, sequence or {variant: value} mapping -> one float per column.
+    """
+    if isinstance(value, dict):
+        return np.array([value.get(c, 0.0) for c in columns], dtype=float)
+    value = np.asarray(value, dtype=float)
+    return np.broadcast_to(value, (len(columns),)).astype(float)
+
+def bars_per_year(index):
+    """
+    Average number of rows per year in a DatetimeIndex, to annualize results
+    that are not on a daily grid (e.g. CUSUM-sampled events).
+    """
+    years = (index[-1] - index[0]) / pd.Timedelta(days=365.25) if len(index) > 1 else 0.0
+    return (len(index) - 1) / years if years > 0 else 252
+
+def backtest(signals, market_returns, cost_per_unit=0.0005, cost_per_trade=0.0, lag=1, periods_per_year=252):
+    """
+    Backtests every column of signals (one variant per column, positions in
+    [-1, 1]) against the market log returns in one vectorized pass.
+    Positions are the signals shifted by `lag` bars. Each variant pays
+    cost_per_unit for every unit of position change plus a fixed
+    cost_per_trade whenever the position changes; both accept a scalar, one
+    value per column, or a {column: cost} dict.
+    Returns (stats table per variant, strategy log returns per bar).
+    """
+    if not isinstance(signals, pd.DataFrame):
+        signals = pd.DataFrame(np.asarray(signals, dtype=float).reshape(len(market_returns), -1),
+                               index=market_returns.index)
+    columns = signals.columns
+    sig = signals.to_numpy(dtype=float)
+    mkt = market_returns.reindex(signals.index).to_numpy(dtype=float)
+
+    pos = np.full_like(sig, np.nan)
+    if lag:
+        pos[lag:] = sig[:-lag]
+    else:
+        pos[:] = sig
+    trades = np.zeros_like(pos)
+    trades[1:] = np.abs(np.diff(pos, axis=0))
+    trades = np.nan_to_num(trades)
+    costs = trades * _per_variant(cost_per_unit, columns) + (trades > 0) * _per_variant(cost_per_trade, columns)
+    strat = pos * mkt[:, None] - costs
+
+    filled = np.nan_to_num(strat)
+    growth = np.exp(np.cumsum(filled, axis=0))
+    drawdown = growth / np.maximum.accumulate(growth, axis=0) - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean, std = np.nanmean(strat, axis=0), np.nanstd(strat, axis=0, ddof=1)
+        sharpe = np.where(std != 0, mean / std * np.sqrt(periods_per_year), 0.0)
+
+    stats = pd.DataFrame({
+        'sharpe': sharpe,
+        'total_return': growth[-1] - 1 if len(growth) else np.zeros(len(columns)),
+        'turnover': trades.mean(axis=0) * periods_per_year,
+        'max_drawdown': drawdown.min(axis=0) if len(drawdown) else np.zeros(len(columns)),
+        'exposure': np.mean(np.nan_to_num(pos) != 0, axis=0),
+    }, index=columns).rename_axis('variant')
+    return stats, pd.DataFrame(strat, index=signals.index, columns=columns)
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+BAR_TYPES = ('time', 'tick', 'volume', 'dollar')
+
+def read_ticks(path, chunk_size=1_000_000, time_col='timestamp', price_col='price', volume_col='volume'):
+    """
+    Yields (times [int64 ns], prices, volumes) arrays from a CSV or Parquet
+    tick file, chunk_size rows at a time, so the file is never fully in memory.
+    Ticks must be in time order.
+    """
+    columns = [time_col, price_col, volume_col]
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        chunks = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns))
+    else:
+        chunks = pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+    for chunk in chunks:
+        times = pd.to_datetime(chunk[time_col]).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        yield times, chunk[price_col].to_numpy(dtype=float), chunk[volume_col].to_numpy(dtype=float)
+
+class BarBuilder:
+    """
+    Turns a stream of tick chunks into OHLCV bars.
+      time:   one bar per `threshold` interval (e.g. '5min'), closed by the first tick of a later interval
+      tick:   a bar every `threshold` ticks
+      volume: a bar each time cumulative volume crosses a multiple of `threshold`
+      dollar: the same on cumulative price * volume
+    Ticks of the bar still open at the end of a chunk are carried into the next
+    one, so the bars do not depend on where chunks are cut. Bars are stamped
+    with the time of their last tick.
+    """
+    def __init__(self, bar_type='dollar', threshold=1e7):
+        if bar_type not in BAR_TYPES:
+            raise ValueError(f"bar_type must be one of {BAR_TYPES}, got {bar_type!r}")
+        self.bar_type = bar_type
+        self.threshold = pd.Timedelta(threshold).value if bar_type == 'time' else float(threshold)
+        # Open bar: its ticks so far, and the cumulative measure before its first tick
+        self._pending = (np.empty(0, np.int64), np.empty(0), np.empty(0))
+        self._base = 0.0
+
+    def _closes(self, times, prices, volumes):
+        """
+        Boolean mask of the ticks that close a bar.
+        """
+        if self.bar_type == 'time':
+            bucket = times // self.threshold
+            # A bucket is only known to be complete once a later tick arrives
+            return np.append(bucket[1:] != bucket[:-1], False)
+        measure = {'tick': lambda: np.ones(len(prices)),
+                   'volume': lambda: volumes,
+                   'dollar': lambda: prices * volumes}[self.bar_type]()
+        cum = self._base + np.cumsum(measure)
+        level = np.floor(cum / self.threshold)
+        closes = np.diff(level, prepend=np.floor(self._base / self.threshold)) > 0
+        if closes.any():
+            self._base = cum[np.flatnonzero(closes)[-1]]
+        return closes
+
+    def update(self, times, prices, volumes):
+        """
+        OHLCV frame of the bars completed by this chunk (may be empty).
+        """
+        times, prices, volumes = (np.concatenate([p, np.asarray(c)]) for p, c in zip(self._pending, (times, prices, volumes)))
+        closes = self._closes(times, prices, volumes)
+        ends = np.flatnonzero(closes) + 1
+        done = ends[-1] if len(ends) else 0
+        self._pending = (times[done:], prices[done:], volumes[done:])
+        return _aggregate(times[:done], prices[:done], volumes[:done], ends)
+
+    def flush(self):
+        """
+        The last, still open bar (empty frame if there is none).
+        """
+        times, prices, volumes = self._pending
+        self._pending = (times[:0], prices[:0], volumes[:0])
+        return _aggregate(times, prices, volumes, np.array([len(times)]) if len(times) else np.array([], dtype=int))
+
+def _aggregate(times, prices, volumes, ends):
+    """
+    OHLCV per bar, where bar i spans ticks [ends[i-1], ends[i]).
+    """
+    if len(ends) == 0:
+        return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'],
+                            index=pd.DatetimeIndex([], name='Date'), dtype=float)
+    starts = np.concatenate([[0], ends[:-1]])
+    return pd.DataFrame({
+        'Open': prices[starts],
+        'High': np.maximum.reduceat(prices, starts),
+        'Low': np.minimum.reduceat(prices, starts),
+        'Close': prices[ends - 1],
+        'Volume': np.add.reduceat(volumes, starts),
+    }, index=pd.DatetimeIndex(times[ends - 1].view('datetime64[ns]'), name='Date'))
+
+def iter_bars(chunks, bar_type='dollar', threshold=1e7, include_last=True):
+    """
+    Generator of bar frames, one per tick chunk (see read_ticks), ending with
+    the open bar if include_last.
+    """
+    builder = BarBuilder(bar_type, threshold)
+    for times, prices, volumes in chunks:
+        bars = builder.update(times, prices, volumes)
+        if len(bars):
+            yield bars
+    if include_last:
+        last = builder.flush()
+        if len(last):
+            yield last
+
+def read_bars(path, bar_type='dollar', threshold=1e7, chunk_size=1_000_000, include_last=True, **columns):
+    """
+    Bars built from a tick file in one streaming pass, as an OHLCV frame that
+    run_pipeline accepts through its `prices` argument. columns maps
+    time_col / price_col / volume_col to the file's column names.
+    """
+    parts = list(iter_bars(read_ticks(path, chunk_size, **columns), bar_type, threshold, include_last))
+    return pd.concat(parts) if parts else _aggregate(None, None, None, [])
@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import hashlib
+import inspect
+import numpy as np
+import pandas as pd
+
+class StageCache:
+    """
+    On-disk, content-addressed cache for pipeline stage outputs.
+    Each result is stored as Parquet under a key hashed from the stage name,
+    the source of the package defining the stage function, its input data
+    and its parameters, so editing a stage or any module it calls into
+    invalidates its entries. Least recently used entries are evicted once the
+    cache grows past max_bytes.
+    """
+    # Arguments that change how a stage runs but not what it returns
+    IGNORED_PARAMS = ('n_jobs',)
+
+    def __init__(self, folder='.cache/stages', max_bytes=2 * 1024 ** 3, verbose=True):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.verbose = verbose
+        self.stats = {}
+        self._sources = {}
+        os.makedirs(folder, exist_ok=True)
+        self._manifest_path = os.path.join(folder, 'manifest.json')
+        self._manifest = self._read_manifest()
+
+    # --- Keys ---
+
+    def _hash_into(self, h, obj):
+        if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+            h.update(type(obj).__name__.encode())
+            if isinstance(obj, pd.DataFrame):
+                h.update(repr((list(obj.columns), [str(t) for t in obj.dtypes])).encode())
+            else:
+                h.update(repr((obj.name, str(obj.dtype))).encode())
+            h.update(pd.util.hash_pandas_object(obj, index=not isinstance(obj, pd.Index)).values.tobytes())
+        elif isinstance(obj, np.ndarray):
+            h.update(repr((obj.shape, str(obj.dtype))).encode())
+            h.update(np.ascontiguousarray(obj).tobytes())
+        elif isinstance(obj, dict):
+            for k in sorted(obj, key=str):
+                h.update(repr(k).encode())
+                self._hash_into(h, obj[k])
+        elif isinstance(obj, (list, tuple)):
+            h.update(f'{type(obj).__name__}{len(obj)}'.encode())
+            for item in obj:
+                self._hash_into(h, item)
+        elif isinstance(obj, (pd.Timestamp, pd.Timedelta, np.generic)):
+            # These carry an (empty) __dict__, so hash their value before the branch below
+            h.update(repr(obj).encode())
+        elif hasattr(obj, 'get_params'):
+            h.update(type(obj).__qualname__.encode())
+            self._hash_into(h, obj.get_params())
+        elif hasattr(obj, '__dict__') and not callable(obj):
+            # Plain config objects (e.g. PurgedKFold): public attributes only
+            h.update(type(obj).__qualname__.encode())
+            self._hash_into(h, {k: v for k, v in vars(obj).items() if not k.startswith('_')})
+        else:
+            h.update(repr(obj).encode())
+
+    def _source(self, func):
+        """
+        Source the stage depends on: every module of the package defining func
+        (stages call into their sibling modules), or just func's module when it
+        is not in a package. Read once per package; func's bytecode when no
+        source is available.
+        """
+        func = getattr(func, '__func__', func)
+        module = inspect.getmodule(func)
+        path = getattr(module, '__file__', None)
+        if path is not None and module.__package__:
+            files = sorted(os.path.join(os.path.dirname(path), f) for f in os.listdir(os.path.dirname(path))
+                           if f.endswith('.py'))
+            name = module.__package__
+        else:
+            files, name = [path] if path is not None else [], getattr(module, '__name__', None)
+        if name is not None and name not in self._sources:
+            try:
+                self._sources[name] = ''.join(open(f).read() for f in files) or None
+            except OSError:
+                self._sources[name] = None
+        source = self._sources.get(name)
+        if source is None:
+            code = getattr(func, '__code__', None)
+            source = code.co_code.hex() if code is not None else ''
+        return source
+
+    def key(self, stage, func, args, kwargs):
+        h = hashlib.sha256(stage.encode())
+        h.update(getattr(func, '__qualname__', repr(func)).encode())
+        h.update(self._source(func).encode())
+        if hasattr(func, '__self__'):
+            self._hash_into(h, func.__self__)
+        self._hash_into(h, list(args))
+        self._hash_into(h, {k: v for k, v in kwargs.items() if k not in self.IGNORED_PARAMS})
+        return h.hexdigest()[:32]
+
+    # --- Storage ---
+
+    def _read_manifest(self):
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path) as f:
+                return json.load(f)
+        return {}
+
+    def _write_manifest(self):
+        tmp = self._manifest_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._manifest, f, indent=1)
+        os.replace(tmp, self._manifest_path)
+
+    def _path(self, key):
+        return os.path.join(self.folder, f'{key}.parquet')
+
+    def _save(self, key, result):
+        if isinstance(result, pd.DataFrame):
+            kind, name, frame = 'frame', None, result
+        elif isinstance(result, pd.Series):
+            kind, name, frame = 'series', result.name, result.to_frame('__value__')
+        elif isinstance(result, pd.Index):
+            kind, name, frame = 'index', result.name, pd.DataFrame({'__value__': result})
+        elif np.isscalar(result):
+            kind, name, frame = 'scalar', None, pd.DataFrame({'__value__': [result]})
+        else:
+            raise TypeError(f"StageCache cannot store results of type {type(result).__name__}.")
+        frame.to_parquet(self._path(key))
+        return kind, name
+
+    def _load(self, key, entry):
+        frame = pd.read_parquet(self._path(key))
+        if entry['kind'] == 'series':
+            return frame['__value__'].rename(entry['name'])
+        if entry['kind'] == 'index':
+            return pd.Index(frame['__value__'], name=entry['name'])
+        if entry['kind'] == 'scalar':
+            return frame['__value__'].iloc[0].item()
+        return frame
+
+    def _evict(self):
+        total = sum(e['bytes'] for e in self._manifest.values())
+        for key in sorted(self._manifest, key=lambda k: self._manifest[k]['last_used']):
+            if total <= self.max_bytes:
+                break
+            total -= self._manifest.pop(key)['bytes']
+            if os.path.exists(self._path(key)):
+                os.remove(self._path(key))
+
+    # --- Public API ---
+
+    def run(self, stage, func, *args, **kwargs):
+        """
+        Returns func(*args, **kwargs), loading it from disk when this stage has
+        already been run on the same inputs and parameters.
+        """
+        key = self.key(stage, func, args, kwargs)
+        stats = self.stats.setdefault(stage, {'hits': 0, 'misses': 0, 'seconds_saved': 0.0})
+        entry = self._manifest.get(key)
+
+        if entry is not None and os.path.exists(self._path(key)):
+            t0 = time.perf_counter()
+            result = self._load(key, entry)
+            stats['hits'] += 1
+            stats['seconds_saved'] += max(0.0, entry['seconds'] - (time.perf_counter() - t0))
+            entry['last_used'] = time.time()
+            self._write_manifest()
+            if self.verbose:
+                print(f"[cache] {stage}: hit")
+            return result
+
+        t0 = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = time.perf_counter() - t0
+        stats['misses'] += 1
+        kind, name = self._save(key, result)
+        self._manifest[key] = {'stage': stage, 'kind': kind, 'name': name, 'seconds': seconds,
+                               'bytes': os.path.getsize(self._path(key)), 'last_used': time.time()}
+        self._evict()
+        self._write_manifest()
+        if self.verbose:
+            print(f"[cache] {stage}: miss ({seconds:.2f}s)")
+        return result
+
+    def report(self):
+        """
+        Hits, misses and compute time saved per stage in this session.
+        """
+        return pd.DataFrame.from_dict(self.stats, orient='index', columns=['hits', 'misses', 'seconds_saved'])
+
+    def size(self):
+        return sum(e['bytes'] for e in self._manifest.values())
+
+    def clear(self):
+        for key in list(self._manifest):
+            if os.path.exists(self._path(key)):
+                os.remove(self._path(key))
+        self._manifest = {}
+        self._write_manifest()
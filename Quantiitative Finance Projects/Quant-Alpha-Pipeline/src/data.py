@@ -0,0 +1,138 @@
+import os
+import re
+import json
+import pandas as pd
+
+DEFAULT_STORE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'prices')
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+# What a source raises when it cannot be reached: no network (ConnectionError,
+# TimeoutError and requests' errors are OSErrors) or its package is not installed
+SOURCE_ERRORS = (OSError, ImportError)
+
+class YFinanceSource:
+    """
+    Daily OHLCV bars from Yahoo Finance.
+    """
+    def fetch(self, symbol, start, end):
+        import yfinance as yf
+        raw = yf.download(symbol, start=start, end=end, auto_adjust=True, progress=False)
+        if isinstance(raw.columns, pd.MultiIndex): raw.columns = raw.columns.get_level_values(0)
+        return raw
+
+class LocalFileSource:
+    """
+    Offline stand-in source: reads <folder>/<symbol>.parquet or .csv exports.
+    """
+    def __init__(self, folder):
+        self.folder = folder
+
+    def fetch(self, symbol, start, end):
+        for ext, reader in (('.parquet', pd.read_parquet), ('.csv', lambda p: pd.read_csv(p, index_col=0, parse_dates=True))):
+            path = os.path.join(self.folder, _file_name(symbol) + ext)
+            if os.path.exists(path):
+                df = reader(path)
+                return df.loc[(df.index >= pd.Timestamp(start)) & (df.index < pd.Timestamp(end))]
+        raise FileNotFoundError(f"No local file for {symbol} in {self.folder}")
+
+def _file_name(symbol):
+    return re.sub(r'[^A-Za-z0-9._-]', '_', symbol)
+
+class PriceStore:
+    """
+    Local columnar price store: one Parquet file per symbol plus a sidecar
+    recording the date range already fetched (per symbol, so parallel
+    workers loading different symbols never write the same file). Only missing ranges are requested from the
+    source; if it fails (e.g. offline) the fallback source is tried.
+    """
+    def __init__(self, folder=DEFAULT_STORE, source=None, fallback=None):
+        self.folder = folder
+        self.source = source if source is not None else YFinanceSource()
+        self.fallback = fallback if fallback is not None else LocalFileSource(os.path.join(os.path.dirname(folder), 'raw'))
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, symbol):
+        return os.path.join(self.folder, _file_name(symbol) + '.parquet')
+
+    def _coverage(self, symbol):
+        path = os.path.join(self.folder, _file_name(symbol) + '.range.json')
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        return None
+
+    def _set_coverage(self, symbol, start, end):
+        path = os.path.join(self.folder, _file_name(symbol) + '.range.json')
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump([str(start.date()), str(end.date())], f)
+        os.replace(tmp, path)
+
+    def missing_ranges(self, symbol, start, end):
+        """
+        [start, end) ranges not yet in the store for symbol.
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        covered = self._coverage(symbol)
+        if covered is None or not os.path.exists(self._path(symbol)):
+            return [(start, end)]
+        have_start, have_end = pd.Timestamp(covered[0]), pd.Timestamp(covered[1])
+        # Gaps between the request and the stored range are filled too, so the
+        # stored range stays contiguous
+        ranges = []
+        if start < have_start:
+            ranges.append((start, have_start))
+        if end > have_end:
+            ranges.append((have_end, end))
+        return ranges
+
+    def _fetch(self, symbol, start, end):
+        try:
+            df = self.source.fetch(symbol, start, end)
+        except SOURCE_ERRORS as e:
+            print(f"Source failed for {symbol} ({e}); using local fallback.")
+            return self.fallback.fetch(symbol, start, end)
+        if not df.empty:
+            return df
+        # yfinance logs a failed download and returns an empty frame instead of
+        # raising; the range may also just hold no bars, so a missing fallback is fine
+        try:
+            return self.fallback.fetch(symbol, start, end)
+        except SOURCE_ERRORS:
+            return df
+
+    def update(self, symbol, start, end):
+        """
+        Fetches and stores only the parts of [start, end) the store does not have.
+        Coverage spans only the bars actually received (up to one day after
+        the last), so a range the source could not fill yet (a future end, a
+        holiday tail, a partial fallback) is requested again on the next update.
+        """
+        ranges = self.missing_ranges(symbol, start, end)
+        if not ranges:
+            return
+        parts = [self._fetch(symbol, s, e) for s, e in ranges]
+        if os.path.exists(self._path(symbol)):
+            parts.insert(0, pd.read_parquet(self._path(symbol)))
+        parts = [p for p in parts if not p.empty]
+        if not parts:
+            raise ValueError(f"No data available for {symbol} between {start} and {end}.")
+        df = pd.concat(parts)
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+        df.index.name = 'Date'
+        df[[c for c in OHLCV if c in df.columns]].to_parquet(self._path(symbol))
+
+        covered = self._coverage(symbol)
+        lo = max(pd.Timestamp(start), df.index.min().normalize())
+        hi = min(pd.Timestamp(end), df.index.max().normalize() + pd.Timedelta(days=1))
+        if covered is not None:
+            lo, hi = min(lo, pd.Timestamp(covered[0])), max(hi, pd.Timestamp(covered[1]))
+        self._set_coverage(symbol, lo, hi)
+
+    def load(self, symbol, start, end, columns=None):
+        """
+        OHLCV frame for [start, end), updating the store first if needed.
+        Stored columns are read through a memory map.
+        """
+        self.update(symbol, start, end)
+        df = pd.read_parquet(self._path(symbol), columns=columns, memory_map=True)
+        return df.loc[(df.index >= pd.Timestamp(start)) & (df.index < pd.Timestamp(end))]
@@ -1,35 +1,283 @@
+import time
 import numpy as np
 import pandas as pd
+from scipy.signal import fftconvolve
+from statsmodels.tsa.stattools import adfuller
+from .parallel import process_pool, resolve_n_jobs
+from . import native
+
+# FFD weights keyed by (d, thres): (forward weights, whether thres cut them off)
+_WEIGHTS_CACHE = {}
+
+# Windows wider than this are applied with FFT convolution
+FFT_MIN_WIDTH = 64
+
+def _ffd_weights(d, thres, width):
+    key = (float(d), float(thres))
+    cached = _WEIGHTS_CACHE.get(key)
+    if cached is None or (not cached[1] and len(cached[0]) < width):
+        w = [1.0]
+        converged = False
+        for k in range(1, width):
+            w_ = -w[-1] / k * (d - k + 1)
+            if abs(w_) < thres:
+                converged = True
+                break
+            w.append(w_)
+        cached = (np.array(w), converged)
+        cached[0].flags.writeable = False
+        _WEIGHTS_CACHE[key] = cached
+    return cached[0][:width]
 
 def get_weights_ffd(d, thres, width):
-    
-    w = [1.0]
-    for k in range(1, width):
-        w_ = -w[-1] / k * (d - k + 1)
-        if abs(w_) < thres: 
-            break
-        w.append(w_)
-    return np.array(w[::-1]).reshape(-1, 1)
+    """
+    FFD weights as a column vector, oldest lag first. Cached per (d, thres).
+    """
+    return _ffd_weights(d, thres, width)[::-1].reshape(-1, 1)
+
+def _apply_weights(vals, w, method):
+    """
+    FFD of every column of vals (rows = time) with forward weights w.
+    """
+    width = len(w) - 1
+    if method == 'cpp':
+        cols = [native.frac_diff(vals[:, j], w[::-1]) for j in range(vals.shape[1])]
+        if all(c is not None for c in cols):
+            return np.column_stack(cols)[width:]
+        method = 'auto'  # window wider than the compiled engine supports
+    if method == 'auto':
+        method = 'fft' if width > FFT_MIN_WIDTH else 'direct'
+    if method == 'fft':
+        return fftconvolve(vals, w.reshape(-1, 1), mode='valid', axes=0)
+    n = vals.shape[0] - width
+    out = np.zeros((n, vals.shape[1]))
+    for k in range(width + 1):
+        out += w[k] * vals[width - k : width - k + n]
+    return out
 
-def frac_diff_ffd(series, d, thres=1e-4):
+def frac_diff_ffd(series, d, thres=1e-4, method='auto'):
     """
     Applies FFD to a pandas DataFrame.
+    All columns are differentiated in one pass; method is 'direct' (sliding
+    window), 'fft' (FFT convolution), 'auto' (picked from the window width) or
+    'cpp' (the compiled FracDiffEngine, falling back to 'auto' if not built).
     """
-    w = get_weights_ffd(d, thres, len(series))
+    if method == 'cpp' and not native.available():
+        print("Warning: compiled AFML engine not found (run `make python` in afml-cpp-engine); using NumPy FFD.")
+        method = 'auto'
+    w = _ffd_weights(d, thres, len(series))
     width = len(w) - 1
     
     if width >= len(series):
         print(f"Warning: Window width {width} exceeds series length {len(series)} for d={d}")
         return pd.DataFrame()
 
+    # After ffill only leading NaNs remain, so columns sharing a first valid
+    # row can be convolved together
+    filled = series.ffill()
+    first_valid = filled.notna().values.argmax(axis=0)
+    first_valid[filled.isna().all().values] = len(filled)
+
     df = {}
-    for name in series.columns:
-        seriesF = series[name].ffill().dropna()
-        vals = seriesF.values
-        res = []
-        # Vectorized-style loop for performance
-        for i in range(width, len(vals)):
-            res.append(np.dot(w.T, vals[i-width : i+1])[0])
-        
-        df[name] = pd.Series(res, index=seriesF.index[width:])
-    return pd.DataFrame(df)
\ No newline at end of file
+    for start in np.unique(first_valid):
+        cols = filled.columns[first_valid == start]
+        block = filled[cols].iloc[start:]
+        if len(block) <= width:
+            for name in cols:
+                df[name] = pd.Series(dtype=float, index=block.index[:0])
+            continue
+        res = _apply_weights(block.to_numpy(dtype=float), w, method)
+        for j, name in enumerate(cols):
+            df[name] = pd.Series(res[:, j], index=block.index[width:])
+    return pd.DataFrame({name: df[name] for name in series.columns})
+
+def _evaluate_d(series, d, thres):
+    """
+    ADF test and memory (correlation with the input) of the FFD series for one d.
+    """
+    t0 = time.perf_counter()
+    ffd = frac_diff_ffd(series.to_frame(), d, thres)
+    row = {'d': d, 'adf_stat': np.nan, 'p_value': np.nan, 'crit_5pct': np.nan, 'corr': np.nan, 'n_obs': 0}
+    if not ffd.empty:
+        ffd = ffd.iloc[:, 0].dropna()
+        if len(ffd) > 10:
+            adf = adfuller(ffd, maxlag=1, regression='c', autolag=None)
+            row.update(adf_stat=adf[0], p_value=adf[1], crit_5pct=adf[4]['5%'], n_obs=len(ffd),
+                       corr=np.corrcoef(series.loc[ffd.index], ffd)[0, 1])
+    row['seconds'] = time.perf_counter() - t0
+    return row
+
+def find_min_ffd(series, d_grid=None, thres=1e-4, p_value=0.05, refine_steps=0, n_jobs=1):
+    """
+    Smallest d whose FFD series passes the ADF test (p <= p_value).
+    The grid is scanned in ascending batches of one candidate per worker and
+    stops at the first batch that reaches stationarity; refine_steps bisection
+    steps then narrow the gap to the last non-stationary d.
+    Returns (d, table) with one row of ADF stat, correlation and timing per candidate.
+    """
+    if isinstance(series, pd.DataFrame):
+        series = series.iloc[:, 0]
+    d_grid = np.sort(np.arange(11) / 10 if d_grid is None else np.asarray(d_grid, dtype=float))
+    batch = resolve_n_jobs(n_jobs)
+    rows = []
+
+    def passes(row):
+        return row['p_value'] <= p_value
+
+    with process_pool(n_jobs, max_tasks=len(d_grid)) as pool:
+        for i in range(0, len(d_grid), batch):
+            futures = [pool.submit(_evaluate_d, series, d, thres) for d in d_grid[i:i + batch]]
+            rows.extend(f.result() for f in futures)
+            if any(passes(r) for r in rows):
+                break
+
+    table = pd.DataFrame(rows)
+    table['stationary'] = table['p_value'] <= p_value
+    if not table['stationary'].any():
+        return None, table
+
+    best = table.loc[table['stationary'], 'd'].min()
+    below = table.loc[~table['stationary'] & (table['d'] < best), 'd']
+    lo = below.max() if len(below) else None
+    for _ in range(refine_steps if lo is not None else 0):
+        mid = (lo + best) / 2
+        row = _evaluate_d(series, mid, thres)
+        rows.append(row)
+        if passes(row):
+            best = mid
+        else:
+            lo = mid
+
+    table = pd.DataFrame(rows).sort_values('d').reset_index(drop=True)
+    table['stationary'] = table['p_value'] <= p_value
+    return best, table
+
+def build_lag_matrix(df, columns, lag_col, lags, valid=None, dtype=np.float64, block_rows=65_536):
+    """
+    Feature matrix of df[columns] plus lags 1..lags of df[lag_col], as one
+    C-contiguous array. Lags are read from a strided sliding-window view of
+    lag_col, so the only full-size allocation is the output itself.
+    Rows with any NaN (or valid == False) are dropped, as are the first `lags`.
+    Returns (matrix, column names, positions of the kept rows in df).
+    """
+    names = list(columns) + [f'{lag_col}_lag_{i}' for i in range(1, lags + 1)]
+    lagged = df[lag_col].to_numpy(dtype=dtype)
+    if len(lagged) <= lags:
+        return np.empty((0, len(names)), dtype=dtype), names, np.empty(0, dtype=np.int64)
+    # windows[r] = [x_t, x_{t-1}, ..., x_{t-lags}] for t = r + lags (a view, no copy)
+    windows = np.lib.stride_tricks.sliding_window_view(lagged, lags + 1)[:, ::-1]
+    base = df[columns].to_numpy(dtype=dtype)
+
+    # a window [x_{t-lags}, ..., x_t] is clean when its NaN count (from a running total) is zero
+    nan_count = np.concatenate([[0], np.cumsum(np.isnan(lagged))])
+    ok = ~np.isnan(base[lags:]).any(axis=1) & (nan_count[lags + 1:] == nan_count[:-lags - 1])
+    if valid is not None:
+        ok &= np.asarray(valid, dtype=bool)[lags:]
+    rows = np.flatnonzero(ok)
+
+    # gather in row blocks so no temporary is larger than one block
+    k = len(columns)
+    out = np.empty((len(rows), k + lags), dtype=dtype)
+    for lo in range(0, len(rows), block_rows):
+        sel = rows[lo:lo + block_rows]
+        out[lo:lo + len(sel), :k] = base[sel + lags]
+        out[lo:lo + len(sel), k:] = windows[sel, 1:]
+    return out, names, rows + lags
+
+class StreamingFFD:
+    """
+    Bar-by-bar FFD, the Python counterpart of the C++ FracDiffEngine ring buffer.
+    Each update costs O(width) and reuses one preallocated window; values match
+    frac_diff_ffd on the same history.
+    """
+    def __init__(self, d, thres=1e-4, max_width=10_000):
+        self.d = d
+        self.thres = thres
+        # Oldest lag first, so the window dots with prices in time order
+        self.weights = _ffd_weights(d, thres, max_width)[::-1].copy()
+        self.size = len(self.weights)
+        # Every price is written twice so buf[head:head + size] is always the
+        # contiguous window, without ever re-allocating
+        self._buf = np.zeros(2 * self.size)
+        self._head = 0
+        self.count = 0
+        self.last_price = np.nan
+
+    @property
+    def ready(self):
+        return self.count >= self.size
+
+    def _push(self, price):
+        if np.isnan(price):
+            price = self.last_price  # same as the ffill in frac_diff_ffd
+            if np.isnan(price):
+                return np.nan
+        self.last_price = price
+        self._buf[self._head] = price
+        self._buf[self._head + self.size] = price
+        self._head = (self._head + 1) % self.size
+        self.count += 1
+        if self.count < self.size:
+            return np.nan
+        return float(np.dot(self.weights, self._buf[self._head : self._head + self.size]))
+
+    def update(self, price):
+        """
+        Adds one bar and returns its FFD value (NaN until the window has filled).
+        """
+        return self._push(float(price))
+
+    def update_many(self, prices):
+        """
+        Adds a batch of bars and returns their FFD values as an array.
+        """
+        return np.array([self._push(p) for p in np.asarray(prices, dtype=float)])
+
+    @classmethod
+    def from_history(cls, prices, d, thres=1e-4, max_width=10_000):
+        """
+        Engine seeded with the last window of a price history. The window keeps
+        its threshold-derived width, so a history shorter than that leaves the
+        engine not ready until enough bars have arrived.
+        """
+        engine = cls(d, thres, max_width=max_width)
+        engine.update_many(np.asarray(prices, dtype=float)[-engine.size:])
+        return engine
+
+    def get_state(self):
+        """
+        Weights, window (oldest price first) and counters as a dict of plain values and arrays.
+        """
+        window = np.roll(self._buf[:self.size], -self._head)
+        return {'d': self.d, 'thres': self.thres, 'weights': self.weights.copy(),
+                'window': window, 'count': self.count, 'last_price': self.last_price}
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Engine rebuilt from get_state() output (or the arrays of a saved checkpoint).
+        """
+        engine = cls.__new__(cls)
+        engine.d = float(state['d'])
+        engine.thres = float(state['thres'])
+        engine.weights = np.asarray(state['weights'], dtype=float).copy()
+        engine.size = len(engine.weights)
+        engine._buf = np.tile(np.asarray(state['window'], dtype=float), 2)
+        engine._head = 0
+        engine.count = int(state['count'])
+        engine.last_price = float(state['last_price'])
+        return engine
+
+    def save(self, path):
+        """
+        Checkpoints the window so a live process can resume without replaying history.
+        """
+        np.savez(path, **self.get_state())
+
+    @classmethod
+    def load(cls, path):
+        """
+        Engine restored from a checkpoint written by save().
+        """
+        with np.load(path) as state:
+            return cls.from_state(state)
@@ -1,45 +1,212 @@
 import pandas as pd
 import numpy as np
+from .parallel import resolve_n_jobs, split_indices, map_processes
+from . import native
 
-def get_daily_vol(close, span0=100):
-    df0 = close.index.searchsorted(close.index - pd.Timedelta(days=1))
+def get_daily_vol(close, span0=100, lookback=pd.Timedelta(days=1)):
+    """
+    EWM std of returns over `lookback` (a calendar day by default; pass a
+    shorter Timedelta for intraday bars).
+    """
+    df0 = close.index.searchsorted(close.index - pd.Timedelta(lookback))
     df0 = df0[df0 > 0]
     df0 = pd.Series(close.index[df0 - 1], index=close.index[close.shape[0] - df0.shape[0]:])
     df0 = close.loc[df0.index] / close.loc[df0.values].values - 1
     return df0.ewm(span=span0).std()
 
-def apply_triple_barrier(close, events, pt_sl):
+class CusumFilter:
+    """
+    Symmetric CUSUM filter with carry-over state, the Python side of the C++
+    CusumFilter: an event fires when the positive or negative run of returns
+    exceeds the threshold, and that run resets.
+    """
+    def __init__(self):
+        self.s_pos = 0.0
+        self.s_neg = 0.0
+
+    def update(self, diffs, thresholds):
+        """
+        Feeds a chunk of returns with their thresholds; returns the positions
+        (within the chunk) where events fired.
+        """
+        s_pos, s_neg = self.s_pos, self.s_neg
+        hits = []
+        # The recursion is sequential, so this is a tight scalar loop over plain floats
+        for i, (x, h) in enumerate(zip(diffs.tolist(), thresholds.tolist())):
+            s_pos = max(0.0, s_pos + x)
+            s_neg = min(0.0, s_neg + x)
+            if s_pos > h:
+                s_pos = 0.0
+                hits.append(i)
+            elif s_neg < -h:
+                s_neg = 0.0
+                hits.append(i)
+        self.s_pos, self.s_neg = s_pos, s_neg
+        return np.array(hits, dtype=np.int64)
+
+def cusum_filter(close, threshold, chunk_size=1_000_000, backend='python'):
+    """
+    Timestamps where the CUSUM of log returns crosses threshold, which is a
+    scalar or a Series aligned on close (e.g. get_daily_vol). Returns before
+    the first valid threshold (the volatility warm-up) are skipped, so no run
+    builds up while nothing can fire. Long series are scanned chunk_size
+    returns at a time with the filter state carried over.
+    backend='cpp' runs the whole series through the compiled CusumFilter when built.
+    """
+    diff = np.log(close).diff().dropna()
+    if isinstance(threshold, pd.Series):
+        h = threshold.reindex(diff.index).ffill().to_numpy(dtype=float)
+        # After ffill only the leading warm-up can be NaN
+        diff, h = diff[~np.isnan(h)], h[~np.isnan(h)]
+    else:
+        h = np.full(len(diff), float(threshold))
+    x = diff.to_numpy(dtype=float)
+
+    if backend == 'cpp':
+        if native.available():
+            return diff.index[native.cusum(x, h)]
+        print("Warning: compiled AFML engine not found (run `make python` in afml-cpp-engine); using Python CUSUM.")
+    cusum = CusumFilter()
+    hits = [start + cusum.update(x[start:start + chunk_size], h[start:start + chunk_size])
+            for start in range(0, len(x), chunk_size)]
+    return diff.index[np.concatenate(hits)] if hits else diff.index[:0]
+
+def _first_touch(prices, start, end, side, pt, sl, max_cells=4_000_000):
+    """
+    Positions of the first profit-take and stop-loss touch for each event path
+    prices[start:end], or -1 when a barrier is never touched.
+    Paths are evaluated as padded (events x horizon) blocks, grouped by length
+    so no block holds more than max_cells returns.
+    """
+    n = len(start)
+    pt_pos = np.full(n, -1, dtype=np.int64)
+    sl_pos = np.full(n, -1, dtype=np.int64)
+    lengths = np.maximum(end - start, 0)
+    order = np.argsort(lengths, kind='stable')
+    check_pt, check_sl = not np.isnan(pt).all(), not np.isnan(sl).all()
+
+    i = 0
+    while i < n:
+        rows = max(1, max_cells // max(lengths[order[i]], 1))
+        j = min(n, i + rows)
+        width = lengths[order[j - 1]]
+        j = min(j, i + max(1, max_cells // max(width, 1)))
+        width = lengths[order[j - 1]]
+        ev = order[i:j]
+        i = j
+        if width == 0:
+            continue
+
+        offsets = np.arange(width)
+        valid = offsets < lengths[ev, None]
+        pos = np.minimum(start[ev, None] + offsets, len(prices) - 1)
+        returns = (prices[pos] / prices[start[ev], None] - 1) * side[ev, None]
+
+        for check, barrier, hit_pos, above in ((check_pt, pt, pt_pos, True), (check_sl, sl, sl_pos, False)):
+            if not check:
+                continue
+            hits = (returns > barrier[ev, None]) if above else (returns < barrier[ev, None])
+            hits &= valid
+            first = hits.argmax(axis=1)
+            touched = hits[np.arange(len(ev)), first]
+            hit_pos[ev[touched]] = start[ev[touched]] + first[touched]
+    return pt_pos, sl_pos
+
+def apply_triple_barrier(close, events, pt_sl, n_jobs=1, min_events_per_job=50_000):
+    """
+    Timestamps of the first stop-loss / profit-take touch before each event's
+    vertical barrier t1. Works on the arrays behind close and events; event sets
+    larger than min_events_per_job are split across n_jobs processes.
+    """
     out = events[['t1']].copy(deep=True)
-    pt = pt_sl[0] * events['trgt'] if pt_sl[0] > 0 else pd.Series(index=events.index)
-    sl = -pt_sl[1] * events['trgt'] if pt_sl[1] > 0 else pd.Series(index=events.index)
-
-    for loc, t1 in events['t1'].fillna(close.index[-1]).items():
-        path = close[loc:t1]
-        returns = (path / close[loc] - 1) * events.at[loc, 'side']
-        out.loc[loc, 'sl'] = returns[returns < sl[loc]].index.min()
-        out.loc[loc, 'pt'] = returns[returns > pt[loc]].index.min()
+    index = close.index
+    prices = close.to_numpy(dtype=float)
+
+    start = index.get_indexer(events.index)
+    if (start < 0).any():
+        raise KeyError(f"{(start < 0).sum()} event start(s) are not in the close index.")
+    end = index.searchsorted(events['t1'].fillna(index[-1]), side='right')
+
+    side = events['side'].to_numpy(dtype=float)
+    trgt = events['trgt'].to_numpy(dtype=float)
+    pt = pt_sl[0] * trgt if pt_sl[0] > 0 else np.full(len(events), np.nan)
+    sl = -pt_sl[1] * trgt if pt_sl[1] > 0 else np.full(len(events), np.nan)
+
+    n_parts = min(resolve_n_jobs(n_jobs), max(1, len(events) // min_events_per_job))
+    parts = split_indices(len(events), n_parts)
+    tasks = [(prices, start[p], end[p], side[p], pt[p], sl[p]) for p in parts]
+    pt_pos = np.full(len(events), -1, dtype=np.int64)
+    sl_pos = np.full(len(events), -1, dtype=np.int64)
+    for p, (pt_part, sl_part) in zip(parts, map_processes(_first_touch, tasks, n_parts)):
+        pt_pos[p], sl_pos[p] = pt_part, sl_part
+
+    out['sl'] = pd.Series(index[np.maximum(sl_pos, 0)], index=events.index).where(sl_pos >= 0)
+    out['pt'] = pd.Series(index[np.maximum(pt_pos, 0)], index=events.index).where(pt_pos >= 0)
     return out
 
-def get_bins(barrier_hits, close):
+def get_bins(barrier_hits, close, side=None):
+    """
+    Labels each event by the barrier it touched first: 1 (profit-take),
+    -1 (stop-loss) or 0 (vertical barrier), plus the return realized at that
+    first touch ('ret'). Resolved for all events in one pass over datetime64 arrays.
+    When meta-labeling, pass the events' side so 'ret' is the return of the bet.
+    """
+    entry = close.index.get_indexer(barrier_hits.index)
+    if (entry < 0).any():
+        raise KeyError(f"{(entry < 0).sum()} event start(s) are not in the close index.")
     out = barrier_hits.copy(deep=True)
-    for loc, row in barrier_hits.iterrows():
-        first_hit = min(row.fillna(close.index[-1]))
-        if row['pt'] == first_hit: out.loc[loc, 'bin'] = 1
-        elif row['sl'] == first_hit: out.loc[loc, 'bin'] = -1
-        else: out.loc[loc, 'bin'] = 0
+    close_times = close.index.to_numpy(dtype='datetime64[ns]')
+    t1, sl, pt = (barrier_hits[c].to_numpy(dtype='datetime64[ns]') for c in ('t1', 'sl', 'pt'))
+
+    # Untouched barriers count as touching at the last bar (NaT compares False below)
+    last = close_times[-1]
+    first_hit = np.minimum(np.minimum(np.where(np.isnat(t1), last, t1), np.where(np.isnat(sl), last, sl)),
+                           np.where(np.isnat(pt), last, pt))
+    out['bin'] = np.where(pt == first_hit, 1.0, np.where(sl == first_hit, -1.0, 0.0))
+
+    prices = close.to_numpy(dtype=float)
+    exit_ = np.minimum(close_times.searchsorted(first_hit), len(prices) - 1)
+    out['ret'] = prices[exit_] / prices[entry] - 1
+    if side is not None:
+        out['ret'] *= side.reindex(barrier_hits.index).to_numpy(dtype=float) if isinstance(side, pd.Series) else side
     return out
 
+def _span_positions(index, bar_start, bar_end):
+    """
+    Integer [start, end) positions in index covering the label slices index[start:end].
+    """
+    start = index.searchsorted(bar_start, side='left')
+    end = index.searchsorted(np.asarray(bar_end), side='right')
+    return start, np.maximum(end, start)
+
 def get_concurrency(bar_start, bar_end, close_index):
-    num_concur = pd.Series(0, index=close_index)
-    for start, end in zip(bar_start, bar_end):
-        num_concur.loc[start:end] += 1
-    return num_concur
+    """
+    Number of events alive on each bar, from a difference array over the
+    event spans: O(N + E) instead of one slice update per event.
+    """
+    start, end = _span_positions(close_index, bar_start, bar_end)
+    n = len(close_index)
+    diff = np.bincount(start, minlength=n + 1) - np.bincount(end, minlength=n + 1)
+    return pd.Series(np.cumsum(diff[:n]), index=close_index)
 
 def get_sample_uniqueness(bar_start, bar_end, num_concur):
-    # bar_start is the index 
-    uniqueness = pd.Series(index=bar_start, dtype=float)
-    for i in range(len(bar_start)):
-        start, end = bar_start[i], bar_end.iloc[i]
-        # Calculate the average uniqueness over the life of the barrier
-        uniqueness.iloc[i] = (1.0 / num_concur.loc[start:end]).mean()
-    return uniqueness
\ No newline at end of file
+    """
+    Average uniqueness (mean of 1/concurrency) over the life of each event.
+    Each event's 1/concurrency is summed over its own span in one reduceat
+    call, so the result does not drift with series length the way a
+    difference of prefix sums does.
+    """
+    start, end = _span_positions(num_concur.index, bar_start, bar_end)
+    concur = num_concur.to_numpy(dtype=float)
+    idle = concur == 0
+    # Trailing zero so an end position equal to len(index) is a valid reduceat index
+    inv = np.append(np.divide(1.0, concur, out=np.zeros_like(concur), where=~idle), 0.0)
+    # Interleaved [start, end) pairs: the even outputs are the per-event sums
+    sums = np.add.reduceat(inv, np.column_stack([start, end]).ravel())[::2] if len(start) else np.zeros(0)
+    # Bars nobody covers would put 1/0 into the mean; keep that as inf
+    idle_csum = np.concatenate(([0], np.cumsum(idle)))
+    span = end - start
+    with np.errstate(invalid='ignore', divide='ignore'):
+        uniqueness = np.where(span > 0, sums / span, np.nan)
+    uniqueness[idle_csum[end] > idle_csum[start]] = np.inf
+    return pd.Series(uniqueness, index=bar_start, dtype=float)
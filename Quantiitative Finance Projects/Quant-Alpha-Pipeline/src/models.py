@@ -1,51 +1,329 @@
+import os
+import json
+import time
+import tempfile
+from contextlib import contextmanager
 import pandas as pd
 import numpy as np
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestClassifier
-from scipy.stats import norm
-from sklearn.metrics import accuracy_score
+from scipy.special import ndtr
+from sklearn.metrics import accuracy_score, log_loss
+from .features import build_lag_matrix
+from .parallel import process_pool
+from .sampling import SequentialBootstrapClassifier
+
+def share_arrays(folder, **arrays):
+    """
+    Writes arrays as .npy files in folder and returns their paths, so
+    workers can memory-map them instead of receiving pickled copies.
+    """
+    paths = {}
+    for name, arr in arrays.items():
+        if arr is None:
+            paths[name] = None
+            continue
+        paths[name] = os.path.join(folder, f'{name}.npy')
+        np.save(paths[name], np.ascontiguousarray(arr))
+    return paths
+
+def load_shared(paths):
+    return {name: None if path is None else np.load(path, mmap_mode='r') for name, path in paths.items()}
+
+@contextmanager
+def _shared_training_data(X, y, sample_weight=None):
+    """
+    Shares X, y and sample_weight through .npy files in a temporary folder
+    for the length of the block; yields their paths.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        yield share_arrays(folder, X=X.to_numpy(), y=y.to_numpy(),
+                           sample_weight=None if sample_weight is None else sample_weight.to_numpy())
+
+def _load_training_data(paths):
+    """
+    (X, y, sample_weight) memory-mapped from _shared_training_data paths.
+    """
+    data = load_shared(paths)
+    return data['X'], data['y'], data['sample_weight']
+
+def _fit_fold(model, paths, train_idx, test_idx, fit_kwargs):
+    """
+    Fits a fresh clone of model on one purged fold of the memory-mapped data.
+    """
+    X, y, sw = _load_training_data(paths)
+    model = clone(model)
+    t0 = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx], sample_weight=None if sw is None else sw[train_idx], **fit_kwargs)
+    fit_time = time.perf_counter() - t0
+    preds = model.predict(X[test_idx])
+    return accuracy_score(y[test_idx], preds), fit_time, preds
+
+def get_bet_sizes(meta_probs):
+    """
+    Bet size in [-1, 1] from the meta-model's probability (Normal CDF scaling).
+    """
+    z = (meta_probs - 0.5) / np.sqrt(meta_probs * (1 - meta_probs) + 1e-9)
+    # ndtr is the standard normal CDF (what norm.cdf calls) without the argument checking
+    return 2 * ndtr(z) - 1
+
+def _meta_targets(train_preds, y_train):
+    """
+    1 where the primary model took a position and got the direction right, else 0.
+    """
+    return ((train_preds != 0) & (train_preds == y_train)).astype(int)
+
+def _positive_proba(model, X):
+    proba = model.predict_proba(X)
+    classes = list(model.classes_)
+    return proba[:, classes.index(1)] if 1 in classes else np.zeros(len(X))
+
+def _walk_forward_step(primary, meta, paths, train_idx, test_idx, prob_threshold, fit_kwargs, return_models=False):
+    """
+    Fits primary and meta models on train_idx and scores test_idx; returns the
+    block's outputs, plus the fitted models if return_models.
+    """
+    X, y, sw = _load_training_data(paths)
+    X_train, y_train = X[train_idx], y[train_idx]
+    sw_train = None if sw is None else sw[train_idx]
+
+    primary.fit(X_train, y_train, sample_weight=sw_train, **fit_kwargs)
+    meta.fit(X_train, _meta_targets(primary.predict(X_train), y_train), sample_weight=sw_train, **fit_kwargs)
+
+    preds = primary.predict(X[test_idx])
+    meta_probs = _positive_proba(meta, X[test_idx])
+    veto = (meta_probs >= prob_threshold).astype(int)
+    bet_sizes = get_bet_sizes(meta_probs)
+    out = {'Primary': preds, 'Meta_Prob': meta_probs, 'Model_Prediction': preds * veto,
+           'Bet_Size': bet_sizes, 'Signal': preds * veto * bet_sizes}
+    return (out, primary, meta) if return_models else out
+
+def _score(model, X, y, scoring, sample_weight=None, labels=None):
+    """
+    Weighted accuracy or negative log loss of model on (X, y). For log loss,
+    labels lists every class in the data, so a test fold holding a class the
+    model never saw gets that class at probability zero instead of raising.
+    """
+    if scoring == 'neg_log_loss':
+        labels = model.classes_ if labels is None else labels
+        proba = np.zeros((len(X), len(labels)))
+        proba[:, np.searchsorted(labels, model.classes_)] = model.predict_proba(X)
+        return -log_loss(y, proba, labels=labels, sample_weight=sample_weight)
+    return accuracy_score(y, model.predict(X), sample_weight=sample_weight)
+
+def _mda_fit(model, paths, train_idx, test_idx, fit_kwargs, scoring, labels):
+    """
+    Fits a clone on one purged fold; returns it with its unpermuted test score.
+    """
+    X, y, sw = _load_training_data(paths)
+    model = clone(model)
+    model.fit(X[train_idx], y[train_idx], sample_weight=None if sw is None else sw[train_idx], **fit_kwargs)
+    base = _score(model, X[test_idx], y[test_idx], scoring, None if sw is None else sw[test_idx], labels)
+    return model, base
+
+# Fitted fold models for the permutation tasks, set once per worker by the pool initializer
+_MDA_MODELS = None
+
+def _init_mda_models(models):
+    global _MDA_MODELS
+    _MDA_MODELS = models
+
+def _mda_permute(paths, fold, test_idx, feature, base, scoring, labels, n_repeats, seed):
+    """
+    Mean score drop of fold model `fold` when column `feature` of its test
+    block is shuffled, over n_repeats permutations.
+    """
+    X, y, sw = _load_training_data(paths)
+    model = _MDA_MODELS[fold]
+    X_test, y_test = np.array(X[test_idx]), y[test_idx]
+    sw_test = None if sw is None else sw[test_idx]
+    rng = np.random.default_rng(seed)
+    col = X_test[:, feature].copy()
+    drop = 0.0
+    for _ in range(n_repeats):
+        X_test[:, feature] = rng.permutation(col)
+        drop += base - _score(model, X_test, y_test, scoring, sw_test, labels)
+    return drop / n_repeats
+
+def _sfi_feature(model, paths, feature, splits, fit_kwargs, scoring, labels):
+    """
+    Purged-CV scores of a model trained on the single column `feature`.
+    """
+    X, y, sw = _load_training_data(paths)
+    scores = []
+    for (train_idx, test_idx), kwargs in zip(splits, fit_kwargs):
+        fold_model = clone(model)
+        fold_model.fit(X[train_idx, feature:feature + 1], y[train_idx],
+                       sample_weight=None if sw is None else sw[train_idx], **kwargs)
+        scores.append(_score(fold_model, X[test_idx, feature:feature + 1], y[test_idx], scoring,
+                             None if sw is None else sw[test_idx], labels))
+    return np.array(scores)
+
+def _importance_frame(scores, feature_names):
+    """
+    Mean and standard error over folds (rows) per feature (columns).
+    """
+    scores = pd.DataFrame(scores, columns=feature_names)
+    return pd.DataFrame({'mean': scores.mean(), 'std_err': scores.std() * len(scores) ** -0.5}
+                        ).sort_values('mean', ascending=False)
+
+FOREST_ARRAYS = ('feature', 'threshold', 'children', 'value', 'roots', 'depth', 'classes')
+
+def _flatten_forest(model):
+    """
+    Packs every tree of a fitted forest into shared node arrays: split feature,
+    threshold, global child indices (children[2 * node + go_right]), per-node
+    class probabilities on the forest's classes and each tree's root. Leaves
+    point to themselves, so all trees can take the same number of steps.
+    """
+    classes = np.asarray(model.classes_)
+    parts = {name: [] for name in ('feature', 'threshold', 'children', 'value', 'roots')}
+    offset, depth = 0, 0
+    for est in model.estimators_:
+        tree = est.tree_
+        nodes = np.arange(tree.node_count)
+        leaf = tree.children_left < 0
+        proba = np.zeros((tree.node_count, len(classes)))
+        # Forest trees are fit on class positions; sequential-bootstrap trees on
+        # the labels themselves, possibly a subset of them
+        cols = np.arange(len(classes)) if isinstance(model, RandomForestClassifier) else classes.searchsorted(est.classes_)
+        proba[:, cols] = tree.value[:, 0, :]
+        total = proba.sum(axis=1, keepdims=True)
+        proba /= np.where(total == 0, 1, total)
+        left = np.where(leaf, nodes, tree.children_left) + offset
+        right = np.where(leaf, nodes, tree.children_right) + offset
+        parts['feature'].append(np.where(leaf, 0, tree.feature).astype(np.int32))
+        parts['threshold'].append(np.where(leaf, np.inf, tree.threshold))
+        parts['children'].append(np.column_stack([left, right]).ravel().astype(np.int32))
+        parts['value'].append(proba)
+        parts['roots'].append(np.array([offset], dtype=np.int32))
+        offset += tree.node_count
+        depth = max(depth, tree.max_depth)
+    forest = {name: np.concatenate(arrs) for name, arrs in parts.items()}
+    forest['depth'] = np.array([depth])
+    forest['classes'] = classes.astype(np.float64)
+    return forest
+
+def _forest_proba(forest, X):
+    """
+    Class probabilities (rows x classes) from flattened trees: all trees walk
+    down together, one level per step. X is cast to float32 as sklearn does.
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+    feature, threshold, children = forest['feature'], forest['threshold'], forest['children']
+    rows = np.arange(X.shape[0])[:, None]
+    node = np.broadcast_to(forest['roots'], (X.shape[0], len(forest['roots'])))
+    for _ in range(int(forest['depth'][0])):
+        go_right = X[rows, feature[node]] > threshold[node]
+        node = children[2 * node + go_right]
+    return forest['value'][node].mean(axis=1)
 
 class AlphaModel:
-    def __init__(self, n_estimators=100, max_depth=5):
-        self.primary_model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=42, class_weight='balanced')
-        self.meta_model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=42, class_weight='balanced')
-
-    def prepare_features(self, df, lags=5):
-        X = df[['Price', 'VIX', 'Log_Volume']].copy()
-        for i in range(1, lags + 1):
-            X[f'Price_lag_{i}'] = df['Price'].shift(i)
-        y = df['label']
-        valid_data = pd.concat([X, y, df[['uniqueness', 't1']]], axis=1).dropna()
-        return valid_data.drop(columns=['label', 'uniqueness', 't1']), valid_data['label'], valid_data['uniqueness'], valid_data['t1']
-
-    def cross_validate_purged(self, X, y, t1, cv_gen, sample_weight=None):
+    def __init__(self, n_estimators=100, max_depth=5, bootstrap='uniform', n_jobs=1):
+        # bootstrap='sequential' swaps the forests for trees bagged with the sequential bootstrap
+        self.bootstrap = bootstrap
+        if bootstrap == 'sequential':
+            self.primary_model = SequentialBootstrapClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=42, class_weight='balanced', n_jobs=n_jobs)
+            self.meta_model = SequentialBootstrapClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=42, class_weight='balanced', n_jobs=n_jobs)
+        else:
+            self.primary_model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=42, class_weight='balanced')
+            self.meta_model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=42, class_weight='balanced')
+        # Flattened forests for score_latest, filled by load() or on first use
+        self._forests = None
+        self._schema = {}
+
+    def prepare_features(self, df, lags=5, dtype=np.float64):
+        """
+        Price/VIX/volume features plus `lags` price lags, keeping only rows with
+        a label, uniqueness and t1. The matrix is built in one C-contiguous
+        buffer (see build_lag_matrix) and wrapped without a copy; pass
+        dtype=np.float32 to halve its footprint.
+        """
+        valid = df[['label', 'uniqueness', 't1']].notna().all(axis=1).to_numpy()
+        matrix, names, rows = build_lag_matrix(df, ['Price', 'VIX', 'Log_Volume'], 'Price', lags,
+                                               valid=valid, dtype=dtype)
+        index = df.index[rows]
+        X = pd.DataFrame(matrix, index=index, columns=names, copy=False)
+        return X, df['label'].iloc[rows], df['uniqueness'].iloc[rows], df['t1'].iloc[rows]
+
+    def _fit_kwargs(self, t1, rows, bar_index):
+        """
+        Extra fit() arguments for the sequential bootstrap: the label spans of
+        the training rows and the stretch of bars they cover.
+        """
+        if self.bootstrap != 'sequential' or t1 is None:
+            return {}
+        spans = t1.iloc[rows]
+        if bar_index is not None and len(spans):
+            bar_index = bar_index[bar_index.searchsorted(spans.index.min()):
+                                  bar_index.searchsorted(spans.max(), side='right')]
+        return {'t1': spans, 'bar_index': bar_index}
+
+    def cross_validate_purged(self, X, y, t1, cv_gen, sample_weight=None, n_jobs=1, bar_index=None):
+        """
+        Mean purged-CV accuracy of the primary model. bar_index (the price bars
+        the labels span) is needed with bootstrap='sequential'.
+        """
+        self._forests = None
+        if n_jobs != 1:
+            folds, _ = self.cross_validate_purged_parallel(X, y, t1, cv_gen, sample_weight, n_jobs=n_jobs,
+                                                           bar_index=bar_index)
+            return folds['score'].mean()
         scores = []
         for train_idx, test_idx in cv_gen.split(X, t1=t1):
             X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
             y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
             sw_train = sample_weight.iloc[train_idx] if sample_weight is not None else None
-            self.primary_model.fit(X_train, y_train, sample_weight=sw_train)
+            self.primary_model.fit(X_train, y_train, sample_weight=sw_train,
+                                   **self._fit_kwargs(t1, train_idx, bar_index))
             preds = self.primary_model.predict(X_test)
             scores.append(accuracy_score(y_test, preds))
         return np.mean(scores)
 
-    def train_and_meta_label(self, X, y, sample_weight=None, train_size=0.8, prob_threshold=0.60):
+    def cross_validate_purged_parallel(self, X, y, t1, cv_gen, sample_weight=None, n_jobs=-1, bar_index=None):
+        """
+        Purged CV with one clone of the primary model per fold, fitted on a
+        process pool. X, y and sample_weight are shared through memory-mapped
+        .npy files. Clones keep the model's random_state, so scores match the
+        serial run. Returns (per-fold score/fit_time frame, out-of-fold predictions).
+        """
+        splits = list(cv_gen.split(X, t1=t1))
+        oos_preds = pd.Series(np.nan, index=X.index)
+        results = []
+        with _shared_training_data(X, y, sample_weight) as paths:
+            with process_pool(n_jobs, max_tasks=len(splits)) as pool:
+                futures = [pool.submit(_fit_fold, self.primary_model, paths, train_idx, test_idx,
+                                       self._fit_kwargs(t1, train_idx, bar_index))
+                           for train_idx, test_idx in splits]
+                for (train_idx, test_idx), future in zip(splits, futures):
+                    score, fit_time, preds = future.result()
+                    oos_preds.iloc[test_idx] = preds
+                    results.append({'score': score, 'fit_time': fit_time,
+                                    'n_train': len(train_idx), 'n_test': len(test_idx)})
+        return pd.DataFrame(results).rename_axis('fold'), oos_preds
+
+    def train_and_meta_label(self, X, y, sample_weight=None, train_size=0.8, prob_threshold=0.60, t1=None,
+                             bar_index=None):
+        self._forests = None
+        # The fitted models' column order, saved with them for score_latest
+        self.feature_names_ = list(X.columns)
         split_idx = int(len(X) * train_size)
         X_train, X_test = X.iloc[:split_idx], X.iloc[split_idx:]
         y_train, y_test = y.iloc[:split_idx], y.iloc[split_idx:]
         sw_train = sample_weight.iloc[:split_idx] if sample_weight is not None else None
+        # Label spans over the price bars drive the sequential bootstrap
+        fit_kwargs = self._fit_kwargs(t1, slice(None, split_idx), bar_index)
         
         # 1. Primary Model
-        self.primary_model.fit(X_train, y_train, sample_weight=sw_train)
+        self.primary_model.fit(X_train, y_train, sample_weight=sw_train, **fit_kwargs)
         test_preds = self.primary_model.predict(X_test)
         
         # 2. Meta-Labeling
         train_preds = self.primary_model.predict(X_train)
-        y_meta_train = pd.Series(0, index=y_train.index)
-        mask = train_preds != 0
-        y_meta_train.loc[mask] = (train_preds[mask] == y_train[mask]).astype(int)
+        y_meta_train = pd.Series(_meta_targets(train_preds, y_train.values), index=y_train.index)
         
         # 3. Meta-Model
-        self.meta_model.fit(X_train, y_meta_train, sample_weight=sw_train)
+        self.meta_model.fit(X_train, y_meta_train, sample_weight=sw_train, **fit_kwargs)
         meta_probs = self.meta_model.predict_proba(X_test)[:, 1]
         
         # --- NEW: VETO LOGIC ---
@@ -53,16 +331,204 @@ class AlphaModel:
         veto_filter = (meta_probs >= prob_threshold).astype(int)
         
         # 4. Bet Sizing
-        bet_sizes = (meta_probs - 0.5) / np.sqrt(meta_probs * (1 - meta_probs) + 1e-9)
-        bet_sizes = pd.Series(2 * norm.cdf(bet_sizes) - 1, index=X_test.index)
+        bet_sizes = pd.Series(get_bet_sizes(meta_probs), index=X_test.index)
         
         # Final Signal = Direction * Veto * Bet Size
         final_signal = test_preds * veto_filter * bet_sizes
         
         # return the vetoed prediction for visualization
         vetoed_preds = test_preds * veto_filter
+
+        # Kept so thresholds and bet sizing can be swept without refitting (see src/sweep.py)
+        self.meta_outputs_ = pd.DataFrame({'Primary': test_preds, 'Meta_Prob': meta_probs, 'Label': y_test.to_numpy()},
+                                          index=X_test.index)
         
         return y_test, vetoed_preds, final_signal, bet_sizes
 
+    def walk_forward(self, X, y, t1, sample_weight=None, refit_every=pd.Timedelta(days=91),
+                     min_train=pd.Timedelta(days=730), pct_embargo=0.01, prob_threshold=0.60,
+                     warm_start_trees=None, n_jobs=-1, bar_index=None):
+        """
+        Expanding-window walk-forward: starting min_train after the first
+        sample, the primary and meta models are refit every refit_every
+        (Timedeltas on the sample start times t1.index) on all earlier samples
+        whose labels end before the next block starts (purge), minus an
+        embargo gap of pct_embargo * len(X) samples, and then score that block.
+        bar_index (the price bars the labels span) is needed with
+        bootstrap='sequential'.
+
+        warm_start_trees=k keeps the previous forests and grows k new trees per
+        refit (RandomForest only); steps are then sequential. Otherwise every
+        step fits fresh clones and independent steps run on a process pool;
+        only the last step sends its models back.
+        Returns a continuous out-of-sample frame with Model_Prediction,
+        Bet_Size, Signal, Meta_Prob and Primary per sample.
+        """
+        self._forests = None
+        self.feature_names_ = list(X.columns)
+        n = len(X)
+        starts = t1.index.to_numpy(dtype='datetime64[ns]')
+        ends = t1.to_numpy(dtype='datetime64[ns]')
+        embargo = int(n * pct_embargo)
+        bounds = pd.date_range(t1.index[0] + pd.Timedelta(min_train), t1.index[-1], freq=pd.Timedelta(refit_every))
+        cuts = np.unique(t1.index.searchsorted(bounds))
+        cuts = cuts[cuts < n]
+        blocks = list(zip(cuts, np.append(cuts[1:], n)))
+
+        steps = []
+        for a, b in blocks:
+            train_idx = np.arange(max(0, a - embargo))
+            train_idx = train_idx[ends[train_idx] < starts[a]]
+            steps.append((train_idx, np.arange(a, b)))
+
+        warm = warm_start_trees is not None and isinstance(self.primary_model, RandomForestClassifier)
+        with _shared_training_data(X, y, sample_weight) as paths:
+            if warm:
+                primary, meta = clone(self.primary_model), clone(self.meta_model)
+                outputs = []
+                for k, (train_idx, test_idx) in enumerate(steps):
+                    if k:
+                        for model in (primary, meta):
+                            model.set_params(warm_start=True, n_estimators=model.n_estimators + warm_start_trees)
+                    outputs.append(_walk_forward_step(primary, meta, paths, train_idx, test_idx, prob_threshold,
+                                                      self._fit_kwargs(t1, train_idx, bar_index)))
+                last = (primary, meta) if steps else None
+            else:
+                with process_pool(n_jobs, max_tasks=len(steps)) as pool:
+                    futures = [pool.submit(_walk_forward_step, clone(self.primary_model), clone(self.meta_model),
+                                           paths, train_idx, test_idx, prob_threshold,
+                                           self._fit_kwargs(t1, train_idx, bar_index), k == len(steps) - 1)
+                               for k, (train_idx, test_idx) in enumerate(steps)]
+                    outputs = [f.result() for f in futures]
+                last = None
+                if outputs:
+                    outputs[-1], primary, meta = outputs[-1]
+                    last = (primary, meta)
+
+        # Keep the most recent models, e.g. for feature importance
+        if last:
+            self.primary_model, self.meta_model = last
+        frames = [pd.DataFrame(out, index=X.index[test_idx]).assign(Step=k)
+                  for k, (out, (_, test_idx)) in enumerate(zip(outputs, steps))]
+        if not frames:
+            return pd.DataFrame()
+        result = pd.concat(frames)
+        self.meta_outputs_ = result[['Primary', 'Meta_Prob']].assign(Label=y.loc[result.index].to_numpy())
+        return result
+
+    def save(self, folder, prob_threshold=0.60):
+        """
+        Writes both fitted forests as flat node arrays (<model>_<array>.npy) plus
+        schema.json with the feature order, classes and veto threshold.
+        """
+        os.makedirs(folder, exist_ok=True)
+        self._forests = {'primary': _flatten_forest(self.primary_model), 'meta': _flatten_forest(self.meta_model)}
+        schema = {'format': 1, 'feature_names': list(self.feature_names_), 'bootstrap': self.bootstrap,
+                  'prob_threshold': prob_threshold, 'models': {}}
+        for name, forest in self._forests.items():
+            for key, arr in forest.items():
+                np.save(os.path.join(folder, f'{name}_{key}.npy'), arr)
+            schema['models'][name] = {'n_trees': len(forest['roots']), 'n_nodes': len(forest['feature']),
+                                      'classes': forest['classes'].tolist()}
+        with open(os.path.join(folder, 'schema.json'), 'w') as f:
+            json.dump(schema, f, indent=2)
+        self._schema = schema
+        return folder
+
+    @classmethod
+    def load(cls, folder, mmap=True):
+        """
+        Model saved by save(), for scoring only: the node arrays are memory-mapped
+        and primary_model / meta_model stay unfitted.
+        """
+        with open(os.path.join(folder, 'schema.json')) as f:
+            schema = json.load(f)
+        model = cls(bootstrap=schema['bootstrap'])
+        model.feature_names_ = schema['feature_names']
+        model._schema = schema
+        # np.asarray drops the memmap subclass (slow to index) but keeps the mapping
+        model._forests = {name: {key: np.asarray(np.load(os.path.join(folder, f'{name}_{key}.npy'),
+                                                         mmap_mode='r' if mmap else None))
+                                 for key in FOREST_ARRAYS}
+                          for name in ('primary', 'meta')}
+        return model
+
+    def score_latest(self, features, prob_threshold=None):
+        """
+        Direction, meta probability, veto and bet size for one new bar.
+        features is a Series/dict keyed by feature name (FFD price, VIX,
+        log volume, lags) or an array in feature_names_ order. The threshold
+        defaults to the one saved with the model.
+        """
+        if self._forests is None:
+            self._forests = {'primary': _flatten_forest(self.primary_model), 'meta': _flatten_forest(self.meta_model)}
+        if isinstance(features, (dict, pd.Series)):
+            x = np.array([features[name] for name in self.feature_names_], dtype=np.float32)
+        else:
+            x = np.asarray(features, dtype=np.float32)
+        if x.shape != (len(self.feature_names_),):
+            raise ValueError(f"Expected {len(self.feature_names_)} features {self.feature_names_}, got shape {x.shape}.")
+        threshold = prob_threshold if prob_threshold is not None else self._schema.get('prob_threshold', 0.60)
+
+        primary, meta = self._forests['primary'], self._forests['meta']
+        direction = float(primary['classes'][_forest_proba(primary, x)[0].argmax()])
+        positive = np.flatnonzero(meta['classes'] == 1)
+        meta_prob = float(_forest_proba(meta, x)[0][positive[0]]) if len(positive) else 0.0
+        veto = meta_prob < threshold
+        bet_size = float(get_bet_sizes(meta_prob))
+        return {'direction': direction, 'meta_prob': meta_prob, 'veto': veto, 'bet_size': bet_size,
+                'signal': 0.0 if veto else direction * bet_size}
+
     def get_feature_importance(self, feature_names):
-        return pd.Series(self.meta_model.feature_importances_, index=feature_names).sort_values(ascending=False)
\ No newline at end of file
+        return pd.Series(self.meta_model.feature_importances_, index=feature_names).sort_values(ascending=False)
+
+    def get_mda_importance(self, X, y, t1, cv_gen, sample_weight=None, scoring='accuracy', n_repeats=1,
+                           random_state=0, n_jobs=-1, bar_index=None):
+        """
+        Purged-CV mean decrease accuracy of the primary model: the score lost
+        when a feature's test values are shuffled. Folds come from cv_gen
+        (PurgedKFold); each is fitted once on a process pool over memory-mapped
+        data, then every (fold, feature) permutation runs as its own pool task
+        against those fits. Scores are weighted by sample_weight. scoring is
+        'accuracy' or 'neg_log_loss'. Returns mean and standard error per feature.
+        """
+        splits = list(cv_gen.split(X, t1=t1))
+        labels = np.unique(y)
+        with _shared_training_data(X, y, sample_weight) as paths:
+            with process_pool(n_jobs, max_tasks=len(splits)) as pool:
+                futures = [pool.submit(_mda_fit, self.primary_model, paths, train_idx, test_idx,
+                                       self._fit_kwargs(t1, train_idx, bar_index), scoring, labels)
+                           for train_idx, test_idx in splits]
+                fits = [future.result() for future in futures]
+
+            models = [model for model, _ in fits]
+            tasks = [(fold, j) for fold in range(len(splits)) for j in range(X.shape[1])]
+            drops = np.zeros((len(splits), X.shape[1]))
+            try:
+                with process_pool(n_jobs, max_tasks=len(tasks), initializer=_init_mda_models,
+                                  initargs=(models,)) as pool:
+                    futures = [pool.submit(_mda_permute, paths, fold, splits[fold][1], j, fits[fold][1], scoring,
+                                           labels, n_repeats, [random_state, fold, j])
+                               for fold, j in tasks]
+                    for (fold, j), future in zip(tasks, futures):
+                        drops[fold, j] = future.result()
+            finally:
+                _init_mda_models(None)
+        return _importance_frame(drops, X.columns)
+
+    def get_sfi_importance(self, X, y, t1, cv_gen, sample_weight=None, scoring='accuracy', n_jobs=-1,
+                           bar_index=None):
+        """
+        Single feature importance: purged-CV score of the primary model trained
+        on each feature alone, one feature per pool task, weighted by
+        sample_weight. Returns mean and standard error per feature.
+        """
+        splits = list(cv_gen.split(X, t1=t1))
+        fit_kwargs = [self._fit_kwargs(t1, train_idx, bar_index) for train_idx, _ in splits]
+        labels = np.unique(y)
+        with _shared_training_data(X, y, sample_weight) as paths:
+            with process_pool(n_jobs, max_tasks=X.shape[1]) as pool:
+                futures = [pool.submit(_sfi_feature, self.primary_model, paths, j, splits, fit_kwargs, scoring, labels)
+                           for j in range(X.shape[1])]
+                scores = np.column_stack([future.result() for future in futures])
+        return _importance_frame(scores, X.columns)
@@ -0,0 +1,61 @@
+import os
+import ctypes
+import numpy as np
+
+# Built by `make python` in afml-cpp-engine/; AFML_NATIVE_LIB overrides the location
+_DEFAULT_LIB = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                            'afml-cpp-engine', 'libafml.so')
+_lib = None
+_load_error = None
+
+def _load():
+    global _lib, _load_error
+    if _lib is not None or _load_error is not None:
+        return _lib
+    path = os.environ.get('AFML_NATIVE_LIB', _DEFAULT_LIB)
+    try:
+        lib = ctypes.CDLL(path)
+    except OSError as e:
+        _load_error = e
+        return None
+    dbl = np.ctypeslib.ndpointer(dtype=np.float64, flags='C_CONTIGUOUS')
+    lib.afml_frac_diff.argtypes = [dbl, ctypes.c_size_t, dbl, ctypes.c_size_t, dbl]
+    lib.afml_frac_diff.restype = ctypes.c_int
+    lib.afml_cusum.argtypes = [dbl, dbl, ctypes.c_size_t, np.ctypeslib.ndpointer(dtype=np.int64, flags='C_CONTIGUOUS')]
+    lib.afml_cusum.restype = ctypes.c_size_t
+    _lib = lib
+    return _lib
+
+def available():
+    """
+    True when the compiled AFML engine could be loaded.
+    """
+    return _load() is not None
+
+# ctypes.CDLL releases the GIL for the duration of each call, so these can run
+# from several threads at once.
+
+def frac_diff(prices, weights):
+    """
+    FFD of a 1-D price array through the C++ FracDiffEngine. weights are
+    oldest lag first (as get_weights_ffd returns them). Returns None when the
+    window is wider than the engine supports.
+    """
+    lib = _load()
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    newest_first = np.ascontiguousarray(np.asarray(weights, dtype=np.float64).ravel()[::-1])
+    out = np.empty_like(prices)
+    if lib.afml_frac_diff(prices, len(prices), newest_first, len(newest_first), out) != 0:
+        return None
+    return out
+
+def cusum(diffs, thresholds):
+    """
+    Positions where the C++ CusumFilter fires over diffs with per-tick thresholds.
+    """
+    lib = _load()
+    diffs = np.ascontiguousarray(diffs, dtype=np.float64)
+    thresholds = np.ascontiguousarray(thresholds, dtype=np.float64)
+    out = np.empty(len(diffs), dtype=np.int64)
+    count = lib.afml_cusum(diffs, thresholds, len(diffs), out)
+    return out[:count]
@@ -0,0 +1,66 @@
+import os
+import multiprocessing
+import numpy as np
+from concurrent.futures import Future, ProcessPoolExecutor
+
+def resolve_n_jobs(n_jobs):
+    """
+    Maps an sklearn-style n_jobs (None, 1, k, -1) to a worker count.
+    Inside a pool worker this is always 1, so pools never nest.
+    """
+    cpus = os.cpu_count() or 1
+    if n_jobs is None or n_jobs == 0 or multiprocessing.parent_process() is not None:
+        return 1
+    if n_jobs < 0:
+        return max(1, cpus + 1 + n_jobs)
+    return min(n_jobs, cpus)
+
+def split_indices(n, n_parts):
+    """
+    Interleaved split of range(n) so each part gets a similar mix of work.
+    """
+    n_parts = max(1, min(n_parts, n))
+    return [np.arange(i, n, n_parts) for i in range(n_parts)]
+
+def map_processes(func, tasks, n_jobs):
+    """
+    Runs func(*task) for each task, on a process pool when more than one
+    worker is available. Results come back in task order.
+    """
+    workers = min(resolve_n_jobs(n_jobs), len(tasks))
+    if workers <= 1:
+        return [func(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(func, *task) for task in tasks]
+        return [f.result() for f in futures]
+
+class SerialExecutor:
+    """
+    In-process stand-in for ProcessPoolExecutor when only one worker is used.
+    """
+    def __init__(self, initializer=None, initargs=()):
+        if initializer is not None:
+            initializer(*initargs)
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        future.set_result(func(*args, **kwargs))
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def process_pool(n_jobs, max_tasks=None, initializer=None, initargs=()):
+    """
+    A ProcessPoolExecutor sized from n_jobs, or a SerialExecutor for one worker.
+    initializer(*initargs) runs once per worker (in-process for the serial one).
+    """
+    workers = resolve_n_jobs(n_jobs)
+    if max_tasks is not None:
+        workers = min(workers, max_tasks)
+    if workers > 1:
+        return ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+    return SerialExecutor(initializer, initargs)
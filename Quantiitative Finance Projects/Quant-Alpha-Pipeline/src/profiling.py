@@ -0,0 +1,141 @@
+import io
+import sys
+import json
+import time
+import cProfile
+import pstats
+import functools
+from contextlib import contextmanager
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def _peak_rss_mb():
+    """
+    Peak resident set size of this process so far, in MiB (None if unsupported).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB on Linux
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+def _children_cpu():
+    """
+    CPU seconds used by finished child processes (pool workers).
+    """
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def count_rows(obj):
+    """
+    Row count of a result, or None when it has no length.
+    """
+    if isinstance(obj, tuple):
+        return count_rows(obj[0]) if obj else None
+    try:
+        return len(obj)
+    except TypeError:
+        return None
+
+class StageProfiler:
+    """
+    Records wall time, CPU time, peak RSS and row counts per pipeline stage.
+    Use `with profiler.stage(name, rows_in=...) as rec:` and set rec['rows_out'],
+    or wrap a callable with profiler.wrap(name, func). Repeated stage names
+    are kept as separate records. If profile_stage names a stage, that stage
+    also runs under cProfile.
+    """
+    def __init__(self, profile_stage=None):
+        self.profile_stage = profile_stage
+        self.records = []
+        self._profile = None
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Context manager that records one run of stage `name`; yields the record
+        so the caller can fill in rows_out.
+        """
+        rec = {'stage': name, 'rows_in': rows_in, 'rows_out': None}
+        profile = cProfile.Profile() if name == self.profile_stage else None
+        rss0 = _peak_rss_mb()
+        wall0, cpu0, child0 = time.perf_counter(), time.process_time(), _children_cpu()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield rec
+        finally:
+            if profile is not None:
+                profile.disable()
+                self._profile = profile
+            rss1 = _peak_rss_mb()
+            rec.update({
+                'wall_seconds': time.perf_counter() - wall0,
+                'cpu_seconds': time.process_time() - cpu0,
+                'child_cpu_seconds': _children_cpu() - child0,
+                'peak_rss_mb': rss1,
+                'rss_growth_mb': None if rss1 is None else rss1 - rss0,
+            })
+            self.records.append(rec)
+
+    def wrap(self, name, func):
+        """
+        func wrapped so each call is recorded under `name`, rows taken from its first argument and result.
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.stage(name, rows_in=count_rows(args[0]) if args else None) as rec:
+                out = func(*args, **kwargs)
+                rec['rows_out'] = count_rows(out)
+            return out
+        return wrapper
+
+    def timings(self):
+        """
+        Wall seconds per stage name, summed over repeats.
+        """
+        totals = {}
+        for rec in self.records:
+            totals[rec['stage']] = totals.get(rec['stage'], 0.0) + rec['wall_seconds']
+        return totals
+
+    def to_frame(self):
+        """
+        One row per stage record.
+        """
+        return pd.DataFrame(self.records)
+
+    def profile_report(self, limit=25):
+        """
+        Top functions by cumulative time for the cProfile'd stage, as text.
+        """
+        if self._profile is None:
+            return ''
+        buf = io.StringIO()
+        pstats.Stats(self._profile, stream=buf).sort_stats('cumulative').print_stats(limit)
+        return buf.getvalue()
+
+    def save(self, path, **meta):
+        """
+        Writes the run report as JSON (meta fields, stage records, totals).
+        The cProfile capture, if any, goes alongside as <path stem>_<stage>.prof.
+        """
+        report = {
+            'meta': meta,
+            'stages': self.records,
+            'total_wall_seconds': sum(r['wall_seconds'] for r in self.records),
+            'peak_rss_mb': _peak_rss_mb(),
+        }
+        if self._profile is not None:
+            prof_path = f"{path.rsplit('.', 1)[0]}_{self.profile_stage}.prof"
+            self._profile.dump_stats(prof_path)
+            report['profile'] = prof_path
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        return path
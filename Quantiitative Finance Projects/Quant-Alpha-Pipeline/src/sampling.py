@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.tree import DecisionTreeClassifier
+from .labeling import _span_positions
+from .parallel import process_pool
+
+def get_indicator_matrix(bar_index, t1):
+    """
+    Sparse (bars x events) 0/1 matrix: entry (t, j) is 1 when bar t lies in
+    the life of event j (t1.index -> t1 values, inclusive).
+    """
+    start, end = _span_positions(bar_index, t1.index, t1.values)
+    lengths = end - start
+    events = np.repeat(np.arange(len(t1)), lengths)
+    bars = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(start, lengths)
+    data = np.ones(len(bars), dtype=np.float32)
+    return sparse.csr_matrix((data, (bars, events)), shape=(len(bar_index), len(t1)))
+
+class SequentialBootstrap:
+    """
+    Sequential bootstrap over overlapping labels: each draw picks an event with
+    probability proportional to its average uniqueness given the draws so far.
+    After a draw only the events overlapping it are updated (through a prefix
+    sum over the drawn bars), and sampling goes through per-block sums, so a
+    draw costs O(overlap + sqrt(N)) rather than a pass over the whole matrix.
+    """
+    def __init__(self, ind_matrix):
+        csc = sparse.csc_matrix(ind_matrix)
+        csc.sort_indices()
+        self.n_bars, self.n_events = csc.shape
+        lengths = np.diff(csc.indptr)
+        if (lengths == 0).any():
+            raise ValueError("Every event must cover at least one bar.")
+        # Events cover contiguous bar ranges [first, last); work in start order
+        first = csc.indices[csc.indptr[:-1]]
+        last = csc.indices[csc.indptr[1:] - 1] + 1
+        self.order = np.argsort(first, kind='stable')
+        self.first = first[self.order]
+        self.last = last[self.order]
+        self.lengths = lengths[self.order].astype(float)
+        self.max_length = int(lengths.max())
+        self.block = max(1, int(np.sqrt(self.n_events)))
+
+    def sample(self, n_samples=None, random_state=None):
+        """
+        Event positions drawn with replacement (n_samples defaults to the number of events).
+        """
+        rng = np.random.default_rng(random_state)
+        n_samples = self.n_events if n_samples is None else n_samples
+        first, last, lengths, block = self.first, self.last, self.lengths, self.block
+
+        counts = np.zeros(self.n_bars)
+        sums = lengths.copy()               # sum over each event's bars of 1 / (count + 1)
+        avg_u = np.ones(self.n_events)      # average uniqueness = sums / lengths
+        block_sums = np.add.reduceat(avg_u, np.arange(0, self.n_events, block))
+
+        draws = np.empty(n_samples, dtype=np.int64)
+        for k in range(n_samples):
+            # Pick a block, then an event inside it
+            cum_blocks = np.cumsum(block_sums)
+            r = rng.random() * cum_blocks[-1]
+            b = min(int(cum_blocks.searchsorted(r, side='right')), len(cum_blocks) - 1)
+            lo = b * block
+            cum_events = np.cumsum(avg_u[lo:lo + block])
+            r -= cum_blocks[b - 1] if b else 0.0
+            j = lo + min(int(cum_events.searchsorted(r, side='right')), len(cum_events) - 1)
+            draws[k] = j
+
+            # Raise the bar counts over event j; each overlapping event changes by
+            # the sum of 1/(c+2) - 1/(c+1) over the bars it shares with j
+            s, e = first[j], last[j]
+            c = counts[s:e]
+            delta = np.concatenate(([0.0], np.cumsum(1.0 / (c + 2.0) - 1.0 / (c + 1.0))))
+            counts[s:e] += 1
+            a = first.searchsorted(s - self.max_length + 1, side='left')
+            z = first.searchsorted(e, side='left')
+            near = np.arange(a, z)
+            near = near[last[near] > s]
+            sums[near] += delta[np.minimum(last[near], e) - s] - delta[np.maximum(first[near], s) - s]
+            avg_u[near] = sums[near] / lengths[near]
+            for bb in range(a // block, (z - 1) // block + 1):
+                block_sums[bb] = avg_u[bb * block:(bb + 1) * block].sum()
+        return self.order[draws]
+
+def seq_bootstrap(ind_matrix, n_samples=None, random_state=None):
+    return SequentialBootstrap(ind_matrix).sample(n_samples, random_state)
+
+# Training arrays and sampler of the forest being fit, set once per worker by the pool initializer
+_TREE_DATA = None
+
+def _init_tree_data(X, y, sample_weight, sampler):
+    global _TREE_DATA
+    _TREE_DATA = (X, y, sample_weight, sampler)
+
+def _fit_tree(params, n_samples, seed):
+    X, y, sample_weight, sampler = _TREE_DATA
+    if sampler is not None:
+        idx = sampler.sample(n_samples, seed)
+    else:
+        idx = np.random.default_rng(seed).integers(0, len(y), n_samples)
+    tree = DecisionTreeClassifier(**params, random_state=seed)
+    tree.fit(X[idx], y[idx], sample_weight=None if sample_weight is None else sample_weight[idx])
+    return tree
+
+class SequentialBootstrapClassifier(ClassifierMixin, BaseEstimator):
+    """
+    Bagged decision trees (random-forest style) whose bootstrap samples come
+    from the sequential bootstrap over label lifetimes. fit() takes t1 (index =
+    event start, value = event end) and the bar index the labels live on;
+    without t1, samples are drawn uniformly. Each pool worker receives the training arrays
+    and the sampler once, then draws and fits its trees from a seed per task.
+    """
+    def __init__(self, n_estimators=100, max_depth=5, max_features='sqrt', class_weight='balanced',
+                 max_samples=None, random_state=42, n_jobs=1):
+        self.n_estimators = n_estimators
+        self.max_depth = max_depth
+        self.max_features = max_features
+        self.class_weight = class_weight
+        self.max_samples = max_samples
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+
+    def fit(self, X, y, sample_weight=None, t1=None, bar_index=None):
+        X = np.asarray(X, dtype=np.float32)
+        y = np.asarray(y)
+        sw = None if sample_weight is None else np.asarray(sample_weight, dtype=float)
+        self.classes_ = np.unique(y)
+        self.n_features_in_ = X.shape[1]
+
+        sampler = None
+        if t1 is not None:
+            # Overlap is measured on the price bars; event times alone would compress it
+            if bar_index is None:
+                raise ValueError("bar_index (the bars the labels span) is required with t1.")
+            sampler = SequentialBootstrap(get_indicator_matrix(bar_index, t1))
+        n_samples = len(y) if self.max_samples is None else int(self.max_samples * len(y)) if \
+            isinstance(self.max_samples, float) else self.max_samples
+
+        params = {'max_depth': self.max_depth, 'max_features': self.max_features, 'class_weight': self.class_weight}
+        seeds = [int(s) for s in np.random.default_rng(self.random_state).integers(0, 2 ** 31 - 1, self.n_estimators)]
+        try:
+            with process_pool(self.n_jobs, max_tasks=self.n_estimators,
+                              initializer=_init_tree_data, initargs=(X, y, sw, sampler)) as pool:
+                futures = [pool.submit(_fit_tree, params, n_samples, s) for s in seeds]
+                self.estimators_ = [f.result() for f in futures]
+        finally:
+            _init_tree_data(None, None, None, None)
+        return self
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        proba = np.zeros((X.shape[0], len(self.classes_)))
+        for tree in self.estimators_:
+            proba[:, self.classes_.searchsorted(tree.classes_)] += tree.predict_proba(X)
+        return proba / len(self.estimators_)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    @property
+    def feature_importances_(self):
+        return np.mean([tree.feature_importances_ for tree in self.estimators_], axis=0)
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from .backtest import backtest
+from .models import get_bet_sizes
+
+# Bet size in [-1, 1] as a function of the meta-model probability
+BET_SIZERS = {
+    'cdf': get_bet_sizes,
+    'cdf_discrete': lambda p: np.round(get_bet_sizes(p) * 10) / 10,
+    'linear': lambda p: 2 * p - 1,
+    'all_in': lambda p: np.ones_like(p),
+}
+
+def sweep_meta_labels(meta_outputs, market_returns, thresholds=None, sizers=('cdf', 'cdf_discrete', 'linear', 'all_in'),
+                      cost_per_unit=0.0005, periods_per_year=252):
+    """
+    Evaluates every (bet sizer, veto threshold) pair on stored meta-labeling
+    outputs (AlphaModel.meta_outputs_: Primary, Meta_Prob, Label) without
+    refitting: signal = Primary * (Meta_Prob >= threshold) * size(Meta_Prob).
+    sizers are names from BET_SIZERS or {name: callable}. Returns one row per
+    pair with activity, number of bets, hit rate and the backtest metrics.
+    Activity, bets and hit rate count the vetoed primary predictions, as
+    run_pipeline's report does, so they depend on the threshold only; the
+    sizer shows up in the backtest metrics (e.g. exposure).
+    """
+    thresholds = np.round(np.linspace(0.5, 0.95, 91), 3) if thresholds is None else np.asarray(thresholds, dtype=float)
+    sizers = sizers if isinstance(sizers, dict) else {name: BET_SIZERS[name] for name in sizers}
+    primary = meta_outputs['Primary'].to_numpy(dtype=float)
+    probs = meta_outputs['Meta_Prob'].to_numpy(dtype=float)
+    correct = primary == meta_outputs['Label'].to_numpy(dtype=float)
+
+    # (bars, thresholds) veto mask, then one block of columns per sizer
+    veto = probs[:, None] >= thresholds[None, :]
+    signals = np.concatenate([(primary * size(probs))[:, None] * veto for size in sizers.values()], axis=1)
+
+    bets = np.tile((primary != 0)[:, None] & veto, len(sizers))
+    n_bets = bets.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        hit_rate = (bets & correct[:, None]).sum(axis=0) / n_bets
+    stats, _ = backtest(pd.DataFrame(signals, index=meta_outputs.index), market_returns,
+                        cost_per_unit=cost_per_unit, periods_per_year=periods_per_year)
+
+    index = pd.MultiIndex.from_product([list(sizers), thresholds], names=['sizer', 'threshold'])
+    table = pd.DataFrame({'activity': bets.mean(axis=0), 'n_bets': n_bets, 'hit_rate': hit_rate}, index=index)
+    return pd.concat([table, stats.set_index(index)], axis=1)
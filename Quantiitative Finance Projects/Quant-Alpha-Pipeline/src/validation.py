@@ -1,3 +1,4 @@
+import hashlib
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import KFold
@@ -10,6 +11,57 @@ class PurgedKFold:
     def __init__(self, n_splits=3, pct_embargo=0.01):
         self.n_splits = n_splits
         self.pct_embargo = pct_embargo
+        self._cache = {}
+
+    @staticmethod
+    def _intervals(t1):
+        """
+        Start/end times of each sample as int64 nanoseconds; open ends (NaT) never end.
+        """
+        starts = t1.index.to_numpy(dtype='datetime64[ns]').view('i8')
+        ends = t1.to_numpy(dtype='datetime64[ns]')
+        open_end = np.isnat(ends)
+        ends = ends.view('i8').copy()
+        ends[open_end] = np.iinfo(np.int64).max
+        return starts, ends, open_end
+
+    def _cache_key(self, n, starts, ends):
+        digest = hashlib.blake2b(starts.tobytes(), digest_size=16)
+        digest.update(ends.tobytes())
+        return (n, self.n_splits, self.pct_embargo, digest.hexdigest())
+
+    def get_splits(self, X, t1):
+        """
+        All (train, test) index pairs, computed once per t1 and cached.
+        Samples must be ordered by start time (t1.index), as KFold blocks assume.
+        """
+        n = X.shape[0]
+        starts, ends, open_end = self._intervals(t1)
+        key = self._cache_key(n, starts, ends)
+        if key in self._cache:
+            return self._cache[key]
+
+        embargo_period = int(n * self.pct_embargo)
+        end_order = np.argsort(ends, kind='stable')
+        sorted_ends = ends[end_order]
+        splits = []
+        for train_indices, test_indices in KFold(n_splits=self.n_splits, shuffle=False).split(X):
+            test_start = starts[test_indices[0]]
+            test_ends = ends[test_indices][~open_end[test_indices]]
+            test_end = test_ends.max() if len(test_ends) else np.iinfo(np.int64).min
+
+            # 1. PURGING: keep only samples that end before or start after the test period
+            keep = np.zeros(n, dtype=bool)
+            keep[end_order[:sorted_ends.searchsorted(test_start, side='left')]] = True
+            after = starts.searchsorted(test_end, side='right')
+            # 2. EMBARGO: drop the samples right after the test block
+            keep[max(after, test_indices[-1] + embargo_period):] = True
+
+            keep[test_indices] = False
+            splits.append((np.flatnonzero(keep), test_indices))
+
+        self._cache[key] = splits
+        return splits
 
     def split(self, X, y=None, groups=None, t1=None):
         """
@@ -17,31 +69,4 @@ class PurgedKFold:
         """
         if t1 is None:
             raise ValueError("t1 (barrier end times) is required for purging.")
-            
-        kf = KFold(n_splits=self.n_splits, shuffle=False)
-        indices = np.arange(X.shape[0])
-        
-        for train_indices, test_indices in kf.split(X):
-            # 1. Identify test times
-            test_t1 = t1.iloc[test_indices]
-            test_start = test_t1.index[0]
-            test_end = test_t1.max()
-            
-            # 2. PURGING
-            relevant_train_indices = []
-            for idx in train_indices:
-                bar_start = t1.index[idx]
-                bar_end = t1.iloc[idx]
-                
-                # If the training bar overlaps with the test period, purge it
-                if not (bar_end < test_start or bar_start > test_end):
-                    continue
-                
-                # 3. EMBARGO
-                embargo_period = int(len(X) * self.pct_embargo)
-                if bar_start > test_end and idx < test_indices[-1] + embargo_period:
-                    continue
-                    
-                relevant_train_indices.append(idx)
-            
-            yield np.array(relevant_train_indices), test_indices
\ No newline at end of file
+        yield from self.get_splits(X, t1)
@@ -1,59 +1,81 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from src.data import PriceStore
+from src.backtest import backtest, bars_per_year
 
-def plot_expanded_performance():
+def load_market_returns(index, ticker='SPY'):
+    """
+    Log returns of ticker between consecutive rows of the results index, read
+    from the local price store. Results sampled on CUSUM events are sparse, so
+    each row carries the return since the previous row, not one day's return.
+    """
+    close = PriceStore().load(ticker, start=index[0] - pd.Timedelta(days=7),
+                              end=index[-1] + pd.Timedelta(days=1), columns=['Close'])['Close']
+    return np.log(close.reindex(index, method='ffill')).diff()
+
+def plot_backtest(strategy_returns, market_returns, ticker='SPY', stats=None, title=None, path=None, show=False):
+    """
+    Growth-of-$1 curves for one or more strategy return columns against the
+    market. Saves to path if given; only blocks on plt.show() when show=True.
+    """
+    fig, ax = plt.subplots(figsize=(12, 7))
+    ax.plot(market_returns.fillna(0).cumsum().apply(np.exp), label=f'{ticker} Benchmark', color='gray', alpha=0.5, linestyle='--')
+    for name, rets in strategy_returns.items():
+        ax.plot(rets.fillna(0).cumsum().apply(np.exp), label=name, linewidth=2)
+
+    ax.set_title(title or 'Strategy Performance', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Growth of $1')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    if stats is not None:
+        ax.text(0.02, 0.85, stats, transform=ax.transAxes, bbox=dict(facecolor='white', alpha=0.8), fontsize=10)
+
+    fig.tight_layout()
+    if path:
+        fig.savefig(path)
+        print(f"Plot saved as '{path}'")
+    if show:
+        plt.show()
+    else:
+        plt.close(fig)
+
+def plot_expanded_performance(ticker='SPY', show=False):
     # 1. Load the expanded test results
     try:
-        df = pd.read_csv('Final_resultsSPY.csv', index_col=0, parse_dates=True)
+        df = pd.read_csv(f'Final_results{ticker}.csv', index_col=0, parse_dates=True)
     except FileNotFoundError:
-        print("Error: Final_resultsSPY.csv not found. Run main.py first.")
+        print(f"Error: Final_results{ticker}.csv not found. Run main.py first.")
         return
 
     # 2. Parameters
     COST_PER_TRADE = 0.0005 # 5 basis points
 
     # 3. Returns Calculation
-    # Price is already log-price from main.py
-    df['market_returns'] = df['Price'].diff()
-    
-    # Shift signals to avoid look-ahead bias
-    df['raw_signal'] = df['Model_Prediction'].shift(1)
-    
-    # Calculate transaction costs
-    df['trades'] = df['raw_signal'].diff().fillna(0).abs()
-    df['transaction_costs'] = df['trades'] * COST_PER_TRADE
-    
-    # Strategy Returns
-    df['Strategy_Returns'] = (df['raw_signal'] * df['market_returns']) - df['transaction_costs']
-    
-    # 4. Cumulative Performance
-    df['Cumulative_Market'] = df['market_returns'].fillna(0).cumsum().apply(np.exp)
-    df['Cumulative_Strategy'] = df['Strategy_Returns'].fillna(0).cumsum().apply(np.exp)
-
-    # 5. Plotting
-    plt.figure(figsize=(12, 7))
-    plt.plot(df['Cumulative_Market'], label='SPY Benchmark', color='gray', alpha=0.5, linestyle='--')
-    plt.plot(df['Cumulative_Strategy'], label='AFML Strategy (Expanded Features)', color='teal', linewidth=2)
-    
-    # Formatting
-    plt.title('Performance with Expanded Features (Volume & VIX Context)', fontsize=14, fontweight='bold')
-    plt.ylabel('Growth of $1')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    
-    # Metrics
-    sharpe = (df['Strategy_Returns'].mean() / df['Strategy_Returns'].std()) * np.sqrt(252) if df['Strategy_Returns'].std() != 0 else 0
-    total_ret = (df['Cumulative_Strategy'].iloc[-1] - 1) * 100
-    
-    stats_text = f"Total Return: {total_ret:.2f}%\nAnn. Sharpe: {sharpe:.2f}\nTop Feature: Log_Volume"
-    plt.gca().text(0.02, 0.85, stats_text, transform=plt.gca().transAxes, 
-                   bbox=dict(facecolor='white', alpha=0.8), fontsize=10)
-
-    plt.tight_layout()
-    plt.savefig('expanded_performance_SPY.png')
-    print("Plot saved as 'expanded_performance_SPY.png'")
-    plt.show()
+    # Price in the results file is the FFD feature, so market returns come from the store
+    try:
+        market_returns = load_market_returns(df.index, ticker)
+    except (OSError, ValueError) as e:
+        print(f"Price store unavailable ({e}); falling back to the Price column.")
+        market_returns = df['Price'].diff()
+
+    # Signals are shifted one bar by the engine to avoid look-ahead bias
+    signals = df[['Model_Prediction']].rename(columns={'Model_Prediction': 'AFML Strategy (Expanded Features)'})
+    stats, strategy_returns = backtest(signals, market_returns, cost_per_unit=COST_PER_TRADE,
+                                       periods_per_year=bars_per_year(df.index))
+    row = stats.iloc[0]
+
+    # 4. Plotting
+    stats_text = f"Total Return: {row['total_return'] * 100:.2f}%\nAnn. Sharpe: {row['sharpe']:.2f}"
+    try:
+        ranking = pd.read_csv(f'Feature_importance{ticker}.csv', index_col=0)
+        stats_text += f"\nTop Feature: {ranking.index[0]}"
+    except FileNotFoundError:
+        pass
+    plot_backtest(strategy_returns, market_returns, ticker, stats=stats_text,
+                  title='Performance with Expanded Features (Volume & VIX Context)',
+                  path=f'expanded_performance_{ticker}.png', show=show)
+    return stats
 
 if __name__ == "__main__":
-    plot_expanded_performance()
\ No newline at end of file
+    plot_expanded_performance(show=True)
@@ -30,6 +30,15 @@ public:
         compute_weights();
     }
 
+    /**
+     * Uses caller-supplied weights (newest lag first), e.g. threshold-truncated
+     * FFD weights from Python. Lags beyond n get a zero weight.
+     */
+    FracDiffEngine(const double* weights, size_t n) : d_(0.0), head_(0), count_(0) {
+        weights_.fill(0.0);
+        std::copy(weights, weights + std::min(n, WindowSize), weights_.begin());
+    }
+
     /**
      * Hot Path: Updates the window and returns the differentiated value.
      * Complexity: O(WindowSize) per tick.
@@ -71,6 +80,7 @@ private:
 class CusumFilter {
 public:
     explicit CusumFilter(double threshold) : threshold_(threshold), s_pos_(0.0), s_neg_(0.0) {}
+    inline void set_threshold(double threshold) { threshold_ = threshold; }
     inline bool update(double diff) {
         s_pos_ = std::max(0.0, s_pos_ + diff);
         s_neg_ = std::min(0.0, s_neg_ + diff);
@@ -0,0 +1,66 @@
+#include <cmath>
+#include <cstddef>
+#include <cstdint>
+#include <limits>
+#include <memory>
+#include "afml_engine.hpp"
+
+/**
+ * C ABI over the AFML engine for Python (ctypes).
+ * Every call processes a whole array, so the per-call overhead is paid once
+ * per series rather than once per tick.
+ */
+
+namespace {
+
+/**
+ * Runs FracDiffEngine<Capacity> with the given weights over prices.
+ * The unused (zero-weight) part of the ring buffer is primed with zeros, so the
+ * first value comes out as soon as `window` real prices have been seen.
+ */
+template<size_t Capacity>
+void run_ffd(const double* prices, size_t n, const double* weights, size_t window, double* out) {
+    auto engine = std::make_unique<FracDiffEngine<Capacity>>(weights, window);
+    for (size_t i = 0; i < Capacity - window; ++i) engine->update(0.0);
+    const double nan = std::numeric_limits<double>::quiet_NaN();
+    for (size_t i = 0; i < n; ++i) {
+        double value = engine->update(prices[i]);
+        out[i] = (i + 1 >= window) ? value : nan;
+    }
+}
+
+}  // namespace
+
+extern "C" {
+
+/**
+ * FFD of prices[0..n) with `window` weights (newest lag first).
+ * out[i] is NaN until the window has filled. Returns 0, or -1 if the window
+ * exceeds the largest compiled capacity.
+ */
+int afml_frac_diff(const double* prices, size_t n, const double* weights, size_t window, double* out) {
+    if (window == 0) return -1;
+    if (window <= 64) run_ffd<64>(prices, n, weights, window, out);
+    else if (window <= 256) run_ffd<256>(prices, n, weights, window, out);
+    else if (window <= 1024) run_ffd<1024>(prices, n, weights, window, out);
+    else if (window <= 4096) run_ffd<4096>(prices, n, weights, window, out);
+    else return -1;
+    return 0;
+}
+
+/**
+ * Symmetric CUSUM over diffs[0..n) with a per-tick threshold. Writes the
+ * positions where events fired to out_positions and returns their count.
+ */
+size_t afml_cusum(const double* diffs, const double* thresholds, size_t n, int64_t* out_positions) {
+    if (n == 0) return 0;
+    CusumFilter filter(thresholds[0]);
+    size_t count = 0;
+    for (size_t i = 0; i < n; ++i) {
+        filter.set_threshold(thresholds[i]);
+        if (filter.update(diffs[i])) out_positions[count++] = static_cast<int64_t>(i);
+    }
+    return count;
+}
+
+}